@@ -0,0 +1,203 @@
+from collections.abc import Mapping
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from pycoupler.data import LPJmLData, LPJmLDataSet
+
+# available aggregations
+AGGREGATIONS = ["sum", "mean", "area_weighted"]
+
+
+class LPJmLAggregator:
+    """Aggregation of cells to groups (e.g. countries or regions) with sparse
+    (CSR) group x cell operators, built once from the group codes of the
+    cells. Aggregating an output of a year is a single sparse matrix product
+    for all bands and years at once. Usually created (and cached) via
+    :meth:`pycoupler.coupler.LPJmLCoupler.get_aggregator`.
+
+    >>> aggregator = coupler.get_aggregator("country", weights="terr_area")
+    >>> country_harvestc = aggregator.aggregate(outputs.pft_harvestc, "sum")
+
+    :param groups: group code of each cell
+    :type groups: numpy.ndarray
+    :param weights: weight of each cell (e.g. terr_area) for area weighted
+        means. Defaults to None
+    :type weights: numpy.ndarray
+    :param name: name of the group dimension. Defaults to "group"
+    :type name: str
+    """
+
+    def __init__(self, groups, weights=None, name="group"):
+        """Constructor method"""
+        self.name = name
+        # group codes and index of the group of each cell
+        self.groups, self.group_index = np.unique(
+            np.asarray(groups).ravel(), return_inverse=True
+        )
+        self.ncell = self.group_index.size
+        shape = (len(self.groups), self.ncell)
+        cells = np.arange(self.ncell)
+
+        self.matrix = csr_matrix(
+            (np.ones(self.ncell), (self.group_index, cells)), shape=shape
+        )
+        self.counts = np.bincount(self.group_index, minlength=len(self.groups))
+
+        if weights is not None:
+            weights = np.asarray(weights, dtype=float).ravel()
+            if weights.size != self.ncell:
+                raise ValueError(
+                    f"Number of weights ({weights.size}) does not match the"
+                    f" number of cells ({self.ncell})."
+                )
+            self.weights = weights
+            self.weighted_matrix = csr_matrix(
+                (weights, (self.group_index, cells)), shape=shape
+            )
+            self.weight_sums = np.bincount(
+                self.group_index, weights=weights, minlength=len(self.groups)
+            )
+        else:
+            self.weights = None
+            self.weighted_matrix = None
+            self.weight_sums = None
+
+    def aggregate_values(self, values, how="sum"):
+        """Aggregate values of cells to groups
+        :param values: values with cells as first dimension
+        :type values: numpy.ndarray
+        :param how: aggregation, "sum", "mean" or "area_weighted" (mean
+            weighted by the weights). Defaults to "sum"
+        :type how: str
+        :return: aggregated values with groups as first dimension
+        :rtype: numpy.ndarray
+        """
+        if how not in AGGREGATIONS:
+            raise ValueError(
+                f"Aggregation {how} not supported, choose from {AGGREGATIONS}."
+            )
+        values = np.asarray(values)
+        if values.shape[0] != self.ncell:
+            raise ValueError(
+                f"Number of cells ({values.shape[0]}) does not match the"
+                f" number of cells of the aggregator ({self.ncell})."
+            )
+        if how == "area_weighted" and self.weighted_matrix is None:
+            raise ValueError("Area weighted aggregation requires weights.")
+
+        flat = values.reshape(self.ncell, -1)
+        if how == "area_weighted":
+            aggregated = self.weighted_matrix @ flat
+            aggregated /= self.weight_sums[:, np.newaxis]
+        else:
+            aggregated = self.matrix @ flat.astype(float, copy=False)
+            if how == "mean":
+                aggregated /= self.counts[:, np.newaxis]
+
+        return aggregated.reshape((len(self.groups),) + values.shape[1:])
+
+    def aggregate(self, output, how="sum"):
+        """Aggregate output(s) of cells to groups, other dimensions (bands,
+        time) are preserved.
+        :param output: output with dimension cell
+        :type output: LPJmLData or LPJmLDataSet or numpy.ndarray
+        :param how: aggregation, "sum", "mean" or "area_weighted" (mean
+            weighted by the weights). Defaults to "sum"
+        :type how: str
+        :return: aggregated output with dimension `name` instead of cell
+        :rtype: LPJmLData or LPJmLDataSet or numpy.ndarray
+        """
+        if isinstance(output, LPJmLDataSet):
+            aggregated = {}
+            for key in output.data_vars:
+                dims = output.variables[key].dims
+                if "cell" not in dims:
+                    continue
+                aggregated[key] = self.aggregate(output[key], how=how)
+                # keep band dimensions of the outputs apart ("band (name)")
+                band_dim = [dim for dim in dims if dim.startswith("band")]
+                if band_dim and band_dim[0] != "band":
+                    aggregated[key] = aggregated[key].rename(band=band_dim[0])
+            return LPJmLDataSet(aggregated)
+        if not isinstance(output, LPJmLData):
+            return self.aggregate_values(output, how=how)
+
+        dims = [dim for dim in output.dims if dim != "cell"]
+        output = output.transpose("cell", *dims)
+        aggregated = LPJmLData(
+            data=self.aggregate_values(output.values, how=how),
+            dims=[self.name] + dims,
+            coords={
+                self.name: self.groups,
+                **{
+                    dim: output.coords[dim].values
+                    for dim in dims
+                    if dim in output.coords
+                },
+            },
+            name=output.name,
+        )
+        aggregated.attrs.update(output.attrs)
+        return aggregated
+
+    def scatter(self, values, weights=None, out=None):
+        """Scatter values of groups to their cells (disaggregation), e.g.
+        decisions per country to inputs per cell. Values of each cell are the
+        values of its group, optionally multiplied by cell weights.
+        :param values: values with groups as first dimension (in the order of
+            :attr:`groups`) or dictionary of values per group code
+        :type values: numpy.ndarray or dict
+        :param weights: weight of each cell values are multiplied by.
+            Defaults to None
+        :type weights: numpy.ndarray
+        :param out: array with cells as first dimension the values are written
+            into (e.g. a reusable input buffer, values are broadcast to its
+            bands). Values must be castable to its data type of the same kind,
+            e.g. round floats explicitly for integer inputs. Defaults to None
+            (new array)
+        :type out: numpy.ndarray
+        :return: values with cells as first dimension
+        :rtype: numpy.ndarray
+        """
+        if isinstance(values, Mapping):
+            missing = [group for group in self.groups.tolist() if group not in values]
+            if missing:
+                raise ValueError(f"Values of groups {missing} are missing.")
+            values = [values[group] for group in self.groups]
+        values = np.asarray(values)
+        if values.shape[0] != len(self.groups):
+            raise ValueError(
+                f"Number of values ({values.shape[0]}) does not match the"
+                f" number of groups ({len(self.groups)})."
+            )
+        if out is None:
+            dtype = values.dtype if weights is None else np.result_type(values, float)
+            out = np.empty((self.ncell,) + values.shape[1:], dtype=dtype)
+        elif out.shape[0] != self.ncell:
+            raise ValueError(
+                f"Number of cells of out ({out.shape[0]}) does not match the"
+                f" number of cells of the aggregator ({self.ncell})."
+            )
+
+        # trailing dimensions of out (e.g. bands) are broadcast
+        shape = values.shape + (1,) * (out.ndim - values.ndim)
+        cell_values = values.reshape(shape)[self.group_index]
+        if weights is not None:
+            weights = np.asarray(weights, dtype=float).ravel()
+            cell_values = cell_values * weights.reshape((-1,) + (1,) * (out.ndim - 1))
+        if not np.can_cast(cell_values.dtype, out.dtype, casting="same_kind"):
+            raise ValueError(
+                f"Values of type {cell_values.dtype} cannot be written into out"
+                f" of type {out.dtype} without truncation, round them first."
+            )
+        out[...] = cell_values
+        return out
+
+    def __repr__(self):
+        """Representation of the aggregator object"""
+        return (
+            f"<pycoupler.{self.__class__.__name__}> {self.ncell} cells to"
+            f" {len(self.groups)} {self.name}"
+            f"{' (weighted)' if self.weights is not None else ''}"
+        )
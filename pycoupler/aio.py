@@ -0,0 +1,306 @@
+import asyncio
+import time
+
+from pycoupler.coupler import LPJmLCoupler, LPJmLToken, inittdt
+from pycoupler.trace import TraceRecorder
+from pycoupler.transport import (
+    LoopbackTransport,
+    TCPTransport,
+    UnixTransport,
+    get_transport,
+)
+
+
+class StreamChannel:
+    """Socket channel on asyncio streams to be used by the LPJmLCoupler.
+    Received bytes are buffered by awaiting :meth:`receive` and the
+    synchronous reading functions of the coupler (read_int, read_into, ...)
+    are served from that buffer. If more bytes are required than buffered
+    while running in another thread than the event loop (e.g. during the
+    handshake), the channel waits for them on the event loop.
+
+    :param reader: stream reader of the LPJmL connection
+    :type reader: asyncio.StreamReader
+    :param writer: stream writer of the LPJmL connection
+    :type writer: asyncio.StreamWriter
+    :param loop: event loop the streams are running on
+    :type loop: asyncio.AbstractEventLoop
+    """
+
+    def __init__(self, reader, writer, loop):
+        """Constructor method"""
+        self._reader = reader
+        self._writer = writer
+        self._loop = loop
+        self._buffer = bytearray()
+        self._offset = 0
+
+    @classmethod
+    async def accept(cls, host="", port=2224, transport=None):
+        """Start a server on host and port and wait for LPJmL to connect
+        :param host: host address of the server. Defaults to "" (all IPs of
+            localhost)
+        :type host: str
+        :param port: port of the server address. Defaults to 2224
+        :type port: int
+        :param transport: transport object to accept the connection on,
+            overrides host and port. Defaults to TCPTransport(host, port)
+        :type transport: LPJmLTransport
+        :return: channel of the accepted connection
+        :rtype: StreamChannel
+        """
+        if transport is None:
+            transport = TCPTransport(host=host, port=port)
+        loop = asyncio.get_running_loop()
+
+        if isinstance(transport, LoopbackTransport):
+            reader, writer = await asyncio.open_connection(sock=transport.accept())
+            return cls(reader, writer, loop)
+
+        connected = loop.create_future()
+
+        def on_connect(reader, writer):
+            if not connected.done():
+                connected.set_result((reader, writer))
+            else:
+                writer.close()
+
+        if isinstance(transport, UnixTransport):
+            transport.prepare()
+            server = await asyncio.start_unix_server(on_connect, path=transport.path)
+        elif isinstance(transport, TCPTransport):
+            server = await asyncio.start_server(
+                on_connect,
+                host=transport.host,
+                port=transport.port,
+                reuse_address=True,
+            )
+        else:
+            raise TypeError(
+                f"Transport {transport} not supported by the asyncio coupler."
+            )
+        try:
+            reader, writer = await connected
+        finally:
+            server.close()
+            if isinstance(transport, UnixTransport):
+                transport.cleanup()
+
+        return cls(reader, writer, loop)
+
+    @property
+    def nbytes_buffered(self):
+        """Get the number of received bytes not yet read by the coupler
+        :getter: Number of buffered bytes
+        :type: int
+        """
+        return len(self._buffer) - self._offset
+
+    async def receive(self, nbytes):
+        """Wait until nbytes have been received and buffer them"""
+        data = await self._reader.readexactly(nbytes)
+        if self._offset == len(self._buffer):
+            self._buffer.clear()
+            self._offset = 0
+        self._buffer += data
+
+    def recv_into(self, buffer, nbytes=0):
+        """Copy buffered bytes into buffer (socket.recv_into interface)"""
+        view = memoryview(buffer).cast("B")
+        nbytes = nbytes or len(view)
+        if self.nbytes_buffered == 0:
+            if self.__in_loop():
+                raise RuntimeError(
+                    "No bytes received from LPJmL. Await receive before reading."
+                )
+            asyncio.run_coroutine_threadsafe(self.receive(nbytes), self._loop).result()
+
+        nbytes = min(nbytes, self.nbytes_buffered)
+        with memoryview(self._buffer) as buffered:
+            view[:nbytes] = buffered[self._offset : self._offset + nbytes]  # noqa
+        self._offset += nbytes
+
+        return nbytes
+
+    def sendall(self, data):
+        """Write data to the stream (socket.sendall interface)"""
+        data = bytes(data)
+        if self.__in_loop():
+            self._writer.write(data)
+        else:
+            asyncio.run_coroutine_threadsafe(self.__write(data), self._loop).result()
+
+    def send(self, data):
+        """Write data to the stream (socket.send interface)"""
+        self.sendall(data)
+        return len(data)
+
+    async def drain(self):
+        """Wait until written data has been flushed to the socket"""
+        await self._writer.drain()
+
+    def close(self):
+        """Close the stream"""
+        if self.__in_loop():
+            self._writer.close()
+        else:
+            self._loop.call_soon_threadsafe(self._writer.close)
+
+    def getsockname(self):
+        """Get address of the socket (socket.getsockname interface)"""
+        return self._writer.get_extra_info("sockname")
+
+    async def __write(self, data):
+        self._writer.write(data)
+        await self._writer.drain()
+
+    def __in_loop(self):
+        try:
+            return asyncio.get_running_loop() is self._loop
+        except RuntimeError:
+            return False
+
+
+class AsyncLPJmLCoupler(LPJmLCoupler):
+    """asyncio variant of the LPJmLCoupler. Socket communication runs on
+    asyncio streams so that the event loop stays free for other tasks (e.g.
+    the coupled model, I/O or monitoring) while LPJmL simulates a year. The
+    handshake and token semantics are the same as for the LPJmLCoupler.
+
+    Instances are created with the :meth:`create` coroutine:
+
+    >>> coupler = await AsyncLPJmLCoupler.create(config_file)
+    >>> for year in coupler.get_sim_years():
+    ...     await coupler.send_input(inputs, year)
+    ...     outputs = await coupler.read_output(year)
+
+    :param config_file: file name (including relative/absolute path) of the
+        corresponding LPJmL configuration to be read simulation details from
+    :type config_file: str
+    :param version: version of the coupler, to be validated with LPJmL internal
+        coupler
+    :type version: int
+    :param host: host address of the server LPJmL is running. Defaults to ""
+        (all IPs of localhost)
+    :type host: str
+    :param port: port of the server address. Defaults to 2224
+    :type port: int
+    :param transport: transport LPJmL connects to ("tcp", "unix",
+        "loopback" or transport object). Defaults to "tcp"
+    :type transport: str or LPJmLTransport
+    :param trace: file name of a binary trace to record the protocol into.
+        Defaults to None (no recording)
+    :type trace: str
+    :param kwargs: further options of :class:`LPJmLCoupler` (e.g.
+        output_ring, upcast, recent_years or cell_mask). prefetch and
+        send_queue are not supported, the event loop already receives and
+        sends while the coupled model computes
+    """
+
+    @classmethod
+    async def create(
+        cls,
+        config_file,
+        version=3,
+        host="",
+        port=2224,
+        transport="tcp",
+        trace=None,
+        **kwargs,
+    ):
+        """Wait for LPJmL to connect and perform the handshake without
+        blocking the event loop.
+        :return: initialized coupler
+        :rtype: AsyncLPJmLCoupler
+        """
+        unsupported = [
+            option for option in ["prefetch", "send_queue"] if kwargs.get(option)
+        ]
+        if unsupported:
+            raise ValueError(
+                f"Options {unsupported} are not supported by the asyncio coupler."
+            )
+        transport = get_transport(transport, host=host, port=port)
+        coupler = cls.__new__(cls)
+        coupler._channel = await StreamChannel.accept(transport=transport)
+        if trace is not None:
+            coupler._channel = TraceRecorder(coupler._channel, trace)
+
+        # the handshake is answered step by step, run it in a worker thread
+        #   with the socket communication still on the event loop
+        await asyncio.to_thread(
+            LPJmLCoupler.__init__,
+            coupler,
+            config_file,
+            version,
+            host,
+            port,
+            transport=transport,
+            **kwargs,
+        )
+        return coupler
+
+    def _open_channel(self, host, port):
+        """Validate connection to LPJmL on the already accepted channel"""
+        return inittdt(self._channel)
+
+    async def read_historic_output(self, to_xarray=True):
+        """Read historic output from LPJmL
+        :return: Dictionary with output keys and corresponding output as numpy
+            arrays with dimensions (ncell, nband)
+        :rtype: dict
+        """
+        return await asyncio.to_thread(super().read_historic_output, to_xarray)
+
+    async def send_input(self, input_dict, year):
+        """Send input data of iterated year as dictionary to LPJmL, see
+        :meth:`LPJmLCoupler.send_input`.
+        """
+        self.stats.begin_call(year)
+        self._validate_operation(LPJmLToken.SEND_INPUT, year)
+
+        for _ in range(self.ninput):
+            # wait for LPJmL to request input (SEND_INPUT token, index, year)
+            start = time.perf_counter()
+            await self._channel.receive(3 * 4)
+            self.stats.add_time(year, "lpjml_s", time.perf_counter() - start)
+            self._send_input_step(input_dict, year)
+            await self._channel.drain()
+
+        self._complete_operation(LPJmLToken.SEND_INPUT, year)
+        self.stats.end_call()
+
+    async def read_output(self, year, to_xarray=True, lazy=False, reduce_only=False):
+        """Read LPJmL output data of the specified year, see
+        :meth:`LPJmLCoupler.read_output`.
+        """
+        self._validate_operation(LPJmLToken.READ_OUTPUT, year)
+
+        if self.wire_plan is None:
+            # first year is read token by token to compile the wire plan
+            return await asyncio.to_thread(
+                super().read_output, year, to_xarray, lazy, reduce_only
+            )
+
+        # wait for the first token of LPJmL, then receive the rest of the year
+        #   (timed as transfer) and decode without waiting
+        plan = self.wire_plan
+        self.stats.begin_call(year)
+        start = time.perf_counter()
+        await self._channel.receive(plan.header_dtype.itemsize)
+        self.stats.add_time(year, "lpjml_s", time.perf_counter() - start)
+
+        offset = plan.header_dtype.itemsize
+        for index, name in self._output_streams():
+            end = (
+                plan.nbytes
+                if index is None
+                else plan.offsets[index] + plan.nbytes_output(index)
+            )
+            start = time.perf_counter()
+            await self._channel.receive(end - offset)
+            self.stats.add_time(
+                year, "receive_s", time.perf_counter() - start, stream=name
+            )
+            offset = end
+        return super().read_output(year, to_xarray, lazy, reduce_only)
@@ -0,0 +1,396 @@
+"""Microbenchmarks of the coupling protocol against the in-process LPJmL
+emulator :class:`pycoupler.testing.FakeLPJmL`.
+
+Run as module or via the command line interface:
+
+    python -m pycoupler.benchmark --output benchmark.json
+    pycoupler-cli benchmark --ncell 1000 67420 --nband 1 64
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import tempfile
+import time
+
+from importlib import metadata
+
+import numpy as np
+
+from pycoupler.config import read_config
+from pycoupler.coupler import LPJmLCoupler, LPJmlValueType
+from pycoupler.data import LPJmLInputType
+from pycoupler.testing import FakeLPJmL
+from pycoupler.transport import get_transport
+
+# datatype names of the meta files of LPJmL outputs
+META_DATATYPES = {
+    LPJmlValueType.LPJML_BYTE: "byte",
+    LPJmlValueType.LPJML_SHORT: "short",
+    LPJmlValueType.LPJML_INT: "int",
+    LPJmlValueType.LPJML_FLOAT: "float",
+    LPJmlValueType.LPJML_DOUBLE: "double",
+}
+
+# base case the sweeps are varied around
+BASE_CASE = dict(ncell=10000, nband=8, noutput=4, lpjml_type="float")
+
+# default sweeps of the benchmark suite
+SWEEPS = dict(
+    ncell=[1000, 10000, 67420],
+    nband=[1, 8, 64],
+    noutput=[1, 4, 16],
+    lpjml_type=["short", "int", "float", "double"],
+)
+
+
+def write_meta(file_name, variable, nbands, datatype, ncell):
+    """Write LPJmL meta file of a (synthetic) output"""
+    meta = {
+        "sim_name": "benchmark",
+        "source": "pycoupler benchmark",
+        "history": "pycoupler benchmark",
+        "variable": variable,
+        "firstcell": 0,
+        "ncell": ncell,
+        "cellsize_lon": 0.5,
+        "cellsize_lat": 0.5,
+        "nstep": 1,
+        "timestep": 1,
+        "nbands": nbands,
+        "long_name": variable,
+        "unit": "",
+        "datatype": datatype,
+        "scalar": 1.0,
+        "order": "cellyear",
+        "bigendian": False,
+        "format": "cdf",
+        "filename": os.path.basename(file_name),
+    }
+    with open(f"{file_name}.json", "w") as meta_file:
+        json.dump(meta, meta_file, indent=2)
+
+
+def write_scenario(
+    path,
+    ncell,
+    nband,
+    noutput,
+    lpjml_type="float",
+    inputs=("with_tillage",),
+    nyear=10,
+    firstyear=2000,
+):
+    """Write synthetic coupled LPJmL configuration (and meta files of its
+    socket outputs) to be used with FakeLPJmL.
+    :param path: directory to write the configuration and meta files to
+    :type path: str
+    :param ncell: number of cells
+    :type ncell: int
+    :param nband: number of bands of each output
+    :type nband: int
+    :param noutput: number of socket outputs (without grid)
+    :type noutput: int
+    :param lpjml_type: datatype of the outputs ("short", "int", "float", ...)
+    :type lpjml_type: str
+    :param inputs: names of the socket inputs (see LPJmLInputType)
+    :type inputs: list
+    :param nyear: number of coupled years
+    :type nyear: int
+    :param firstyear: first coupled year. Defaults to 2000
+    :type firstyear: int
+    :return: file name of the configuration
+    :rtype: str
+    """
+    outputvar = [{"id": 0, "name": "grid"}]
+    output = []
+    for index in range(noutput + 1):
+        name = "grid" if index == 0 else f"output{index}"
+        if index > 0:
+            outputvar.append({"id": index, "name": name})
+        file_name = f"{path}/{name}.nc4"
+        output.append(
+            {"id": name, "file": {"fmt": "cdf", "name": file_name, "socket": True}}
+        )
+        if index == 0:
+            write_meta(file_name, name, 2, "float", ncell)
+        else:
+            write_meta(file_name, name, nband, lpjml_type, ncell)
+
+    config = {
+        "sim_name": "benchmark",
+        "coupled_model": "benchmark",
+        "version": "5.8",
+        "input": {
+            name: {"id": LPJmLInputType[name].value, "fmt": "sock", "socket": True}
+            for name in inputs
+        },
+        "output": output,
+        "outputvar": outputvar,
+        "output_metafile": True,
+        "startgrid": 0,
+        "endgrid": ncell - 1,
+        "firstyear": firstyear,
+        "lastyear": firstyear + nyear - 1,
+        "outputyear": firstyear,
+        "start_coupling": firstyear,
+    }
+    config_file = f"{path}/config_benchmark.json"
+    with open(config_file, "w") as file:
+        json.dump(config, file, indent=2)
+
+    return config_file
+
+
+def summarize(seconds, nbytes):
+    """Summarize per-year timings (first year excluded from the steady state)
+    :param seconds: duration of each year in seconds
+    :type seconds: list
+    :param nbytes: bytes exchanged per year
+    :type nbytes: int
+    :return: dictionary of timings in seconds and throughput in MB/s
+    :rtype: dict
+    """
+    steady = seconds[1:] or seconds
+    median = statistics.median(steady)
+    return {
+        "bytes_per_year": nbytes,
+        "first_year_s": seconds[0],
+        "median_s": median,
+        "min_s": min(steady),
+        "max_s": max(steady),
+        "mb_per_s": nbytes / median / 1e6 if median > 0 else None,
+    }
+
+
+def run_case(
+    ncell,
+    nband,
+    noutput,
+    lpjml_type="float",
+    inputs=("with_tillage",),
+    nyear=10,
+    transport="loopback",
+    to_xarray=True,
+    port=2224,
+):
+    """Run one benchmark case: handshake, send_input and read_output of
+    nyear years against FakeLPJmL.
+    :return: dictionary of case parameters and results
+    :rtype: dict
+    """
+    with tempfile.TemporaryDirectory() as path:
+        config_file = write_scenario(
+            path, ncell, nband, noutput, lpjml_type, inputs=inputs, nyear=nyear
+        )
+        transport = get_transport(transport, port=port, path=f"{path}/lpjml.sock")
+        lpjml = FakeLPJmL.from_config(
+            read_config(config_file),
+            transport=transport,
+            record_inputs=False,
+            constant_data=True,
+        )
+        lpjml.start()
+
+        start = time.perf_counter()
+        coupler = LPJmLCoupler(config_file, transport=transport)
+        handshake = time.perf_counter() - start
+
+        input_data = {
+            name: np.zeros(
+                (ncell, LPJmLInputType[name].nband),
+                dtype=LPJmLInputType[name].type,
+            )
+            for name in inputs
+        }
+        send_seconds = []
+        read_seconds = []
+        for year in coupler.get_sim_years():
+            start = time.perf_counter()
+            coupler.send_input(input_data, year)
+            send_seconds.append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            coupler.read_output(year, to_xarray=to_xarray)
+            read_seconds.append(time.perf_counter() - start)
+
+        coupler.close()
+        lpjml.join()
+
+    input_bytes = sum(
+        ncell * input_bands * value_type.dtype.itemsize
+        for input_bands, value_type in lpjml.inputs.values()
+    )
+    output_bytes = sum(
+        ncell * lpjml.outputs[index][0] * lpjml.outputs[index][1].dtype.itemsize
+        for index in lpjml.order
+    )
+    return {
+        "ncell": ncell,
+        "nband": nband,
+        "noutput": noutput,
+        "lpjml_type": lpjml_type,
+        "inputs": list(inputs),
+        "nyear": nyear,
+        "transport": transport.name,
+        "to_xarray": to_xarray,
+        "handshake_s": handshake,
+        "send_input": summarize(send_seconds, input_bytes),
+        "read_output": summarize(read_seconds, output_bytes),
+    }
+
+
+def get_cases(sweeps=None, base_case=None, grid=False):
+    """Get benchmark cases, either varying one parameter at a time around the
+    base case or (grid) all combinations of the sweeps
+    :return: list of case parameters
+    :rtype: list
+    """
+    sweeps = SWEEPS if sweeps is None else sweeps
+    base_case = BASE_CASE if base_case is None else base_case
+
+    if grid:
+        cases = [{}]
+        for key, values in sweeps.items():
+            cases = [dict(case, **{key: value}) for case in cases for value in values]
+        return [dict(base_case, **case) for case in cases]
+
+    cases = []
+    for key, values in sweeps.items():
+        for value in values:
+            case = dict(base_case, **{key: value})
+            if case not in cases:
+                cases.append(case)
+    return cases
+
+
+def run_benchmark(cases, verbose=False, **kwargs):
+    """Run benchmark cases
+    :param cases: list of case parameters (see :func:`get_cases`)
+    :type cases: list
+    :param verbose: if True, print a summary line per case
+    :type verbose: bool
+    :param kwargs: further arguments of :func:`run_case` (e.g. nyear)
+    :return: benchmark results with environment information
+    :rtype: dict
+    """
+    try:
+        version = metadata.version("pycoupler")
+    except metadata.PackageNotFoundError:
+        version = None
+
+    results = []
+    for case in cases:
+        result = run_case(**case, **kwargs)
+        results.append(result)
+        if verbose:
+            print(
+                f"ncell={result['ncell']:>6} nband={result['nband']:>3}"
+                f" noutput={result['noutput']:>3} {result['lpjml_type']:>6}:"
+                f" handshake {result['handshake_s'] * 1e3:8.1f} ms,"
+                f" read_output {result['read_output']['median_s'] * 1e3:8.2f} ms"
+                f" ({result['read_output']['mb_per_s']:8.1f} MB/s),"
+                f" send_input {result['send_input']['median_s'] * 1e3:8.2f} ms"
+            )
+
+    return {
+        "pycoupler": version,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "results": results,
+    }
+
+
+def add_arguments(parser):
+    """Add benchmark arguments to argument parser"""
+    parser.add_argument(
+        "--ncell", type=int, nargs="+", help="numbers of cells to benchmark"
+    )
+    parser.add_argument(
+        "--nband", type=int, nargs="+", help="numbers of bands per output"
+    )
+    parser.add_argument("--noutput", type=int, nargs="+", help="numbers of outputs")
+    parser.add_argument(
+        "--type",
+        dest="lpjml_type",
+        nargs="+",
+        choices=list(META_DATATYPES.values()),
+        help="datatypes of the outputs",
+    )
+    parser.add_argument(
+        "--inputs",
+        nargs="+",
+        default=["with_tillage"],
+        choices=[input_type.name for input_type in LPJmLInputType],
+        help="socket inputs to send (default: with_tillage)",
+    )
+    parser.add_argument(
+        "--years", type=int, default=10, help="number of years (default: 10)"
+    )
+    parser.add_argument(
+        "--transport",
+        default="loopback",
+        choices=["loopback", "unix", "tcp"],
+        help="transport to LPJmL (default: loopback)",
+    )
+    parser.add_argument(
+        "--port", type=int, default=2224, help="port for tcp (default: 2224)"
+    )
+    parser.add_argument(
+        "--to-numpy",
+        action="store_true",
+        help="read outputs as numpy arrays instead of xarray",
+    )
+    parser.add_argument(
+        "--grid",
+        action="store_true",
+        help="run all combinations instead of one parameter at a time",
+    )
+    parser.add_argument(
+        "--output", "-o", help="file to write the results to (JSON, default: stdout)"
+    )
+
+
+def run_from_args(args):
+    """Run benchmark from parsed command line arguments"""
+    sweeps = {
+        key: getattr(args, key) or (SWEEPS[key] if not args.grid else [BASE_CASE[key]])
+        for key in SWEEPS
+    }
+    if not args.grid:
+        # only sweep supplied parameters, if any supplied
+        supplied = {key: values for key, values in sweeps.items() if getattr(args, key)}
+        sweeps = supplied or sweeps
+    cases = get_cases(sweeps, grid=args.grid)
+
+    results = run_benchmark(
+        cases,
+        verbose=args.output is not None,
+        inputs=args.inputs,
+        nyear=args.years,
+        transport=args.transport,
+        to_xarray=not args.to_numpy,
+        port=args.port,
+    )
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+    return results
+
+
+def main(argv=None):
+    """Run the benchmark suite from the command line"""
+    parser = argparse.ArgumentParser(
+        prog="python -m pycoupler.benchmark", description=__doc__.splitlines()[0]
+    )
+    add_arguments(parser)
+    run_from_args(parser.parse_args(argv))
+
+
+if __name__ == "__main__":
+    main()
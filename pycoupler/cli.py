@@ -0,0 +1,26 @@
+import argparse
+
+from pycoupler import benchmark
+
+
+def main(argv=None):
+    """Command line interface of pycoupler"""
+    parser = argparse.ArgumentParser(
+        prog="pycoupler-cli", description="pycoupler command line interface"
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    benchmark_parser = subparsers.add_parser(
+        "benchmark",
+        help="run coupling protocol microbenchmarks",
+        description=benchmark.__doc__.splitlines()[0],
+    )
+    benchmark.add_arguments(benchmark_parser)
+    benchmark_parser.set_defaults(func=benchmark.run_from_args)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 import os
 import sys
-import socket
 import struct
 import tempfile
+import time
 
 import numpy as np
 import pandas as pd
@@ -10,72 +10,45 @@ import xarray as xr
 
 from subprocess import run
 from enum import Enum
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
 
 from pycoupler.config import read_config
 from pycoupler.data import (
     LPJmLInputType,
     LPJmLData,
     LPJmLDataSet,
-    append_to_dict,
     read_meta,
     read_data,
     read_header,
 )
+from pycoupler.aggregation import LPJmLAggregator
+from pycoupler.history import HISTORY_DIMS, LPJmLMemmapHistory, LPJmLRingHistory
+from pycoupler.reducers import LPJmLReducer
+from pycoupler.stats import LPJmLCouplerStats
+from pycoupler.trace import TraceRecorder
+from pycoupler.transport import TCPTransport, get_transport
 from pycoupler.utils import get_countries
+from pycoupler.writer import LPJmLOutputWriter
 
 
-class test_channel:
-    """Test channel class for testing purposes"""
-
-    def __init__(self):
-        pass
-
-    def sendall(self, val):
-        pass
-
-    def recv(self, val):
-        pass
-
-    def close(self):
-        pass
-
-    def send(self, val):
-        pass
-
-    def getsockname(self):
-        return ["test", "<none>"]
-
-
-def write_bytestring_to_file(bytestring, filepath):
-    """Write bytestring to file in binary mode (for testing purposes)"""
-    with open(filepath, "a") as file:
-        file.write(str(bytestring) + "\n")
-
-
-def read_lines_from_file(filepath):
-    """Read lines from a file and return as a list (for testing purposes)"""
-
-    with open(filepath, "r") as file:  # Read the file in binary mode
-        bytestring = file.read().strip()
+def recvall_into(channel, buffer):
+    """receive bytes from channel until (preallocated) buffer is filled"""
+    view = memoryview(buffer).cast("B")
+    size = len(view)
+    nbytes = 0
+    while nbytes < size:
+        received = channel.recv_into(view[nbytes:], size - nbytes)
+        if not received:
+            raise ConnectionError("Socket connection closed by LPJmL.")
+        nbytes += received
 
-    lines = bytestring.split("\n")
-    if int(os.environ["TEST_LINE_COUNTER"]) < len(lines):
-        line = lines[int(os.environ["TEST_LINE_COUNTER"])]
-        os.environ["TEST_LINE_COUNTER"] = str(int(os.environ["TEST_LINE_COUNTER"]) + 1)
-        return line
-    else:
-        return None
+    return buffer
 
 
 def recvall(channel, size):
     """basic receive function"""
-    bytestring = b""
-    nbytes = 0
-    while nbytes < size:
-        bytestring += channel.recv(size - nbytes)
-        nbytes += len(bytestring)
-
-    return bytestring
+    return recvall_into(channel, bytearray(size))
 
 
 def send_int(channel, val):
@@ -85,31 +58,15 @@ def send_int(channel, val):
 
 def read_int(channel):
     """read received string as integer"""
-    if hasattr(sys, "_called_from_test"):
-        # write_bytestring_to_file(inttup[0], os.path.join(os.path.dirname(__file__), '../tests/data/test_receive.txt')) # noqa
-        inttup = [
-            int(
-                read_lines_from_file(f"{os.environ['TEST_PATH']}/data/test_receive.txt")
-            )
-        ]  # noqa
-    else:
-        intstr = recvall(channel, struct.calcsize("i"))
-        inttup = struct.unpack("i", intstr)
+    intstr = recvall(channel, struct.calcsize("i"))
+    inttup = struct.unpack("i", intstr)
     return inttup[0]
 
 
 def read_short(channel):
     """read received string as short"""
-    if hasattr(sys, "_called_from_test"):
-        # write_bytestring_to_file(inttup[0], os.path.join(os.path.dirname(__file__), '../tests/data/test_receive.txt')) # noqa
-        inttup = [
-            int(
-                read_lines_from_file(f"{os.environ['TEST_PATH']}/data/test_receive.txt")
-            )
-        ]  # noqa
-    else:
-        intstr = recvall(channel, struct.calcsize("h"))
-        inttup = struct.unpack("h", intstr)
+    intstr = recvall(channel, struct.calcsize("h"))
+    inttup = struct.unpack("h", intstr)
     return inttup[0]
 
 
@@ -120,20 +77,37 @@ def send_float(channel, val):
 
 def read_float(channel):
     """read received string as float"""
-    if hasattr(sys, "_called_from_test"):
-        # write_bytestring_to_file(floattup[0], os.path.join(os.path.dirname(__file__), '../tests/data/test_receive.txt')) # noqa
-        floattup = [
-            float(
-                read_lines_from_file(f"{os.environ['TEST_PATH']}/data/test_receive.txt")
-            )
-        ]  # noqa
-    else:
-        floatstr = recvall(channel, struct.calcsize("f"))
-        floattup = struct.unpack("f", floatstr)
+    floatstr = recvall(channel, struct.calcsize("f"))
+    floattup = struct.unpack("f", floatstr)
 
     return floattup[0]
 
 
+def read_double(channel):
+    """read received string as double"""
+    doublestr = recvall(channel, struct.calcsize("d"))
+    doubletup = struct.unpack("d", doublestr)
+
+    return doubletup[0]
+
+
+def read_into(channel, array):
+    """read received string directly into contiguous numpy array (in memory
+    order of the array, so Fortran ordered (cell, band) arrays are filled band
+    by band)
+    """
+    if not (array.flags.c_contiguous or array.flags.f_contiguous):
+        raise ValueError("Array to be received into must be contiguous.")
+    # one-dimensional view on the memory of array (no copy)
+    recvall_into(channel, array.reshape(-1, order="A"))
+    return array
+
+
+def read_array(channel, dtype, count):
+    """read received string as numpy array of count values of dtype"""
+    return read_into(channel, np.empty(count, dtype=dtype))
+
+
 class LPJmlValueType(Enum):
     """Available datatypes"""
 
@@ -151,6 +125,20 @@ class LPJmlValueType(Enum):
         else:
             return int
 
+    @property
+    def dtype(self):
+        """Return numpy data type of values as sent via the socket"""
+        if self.name == "LPJML_BYTE":
+            return np.dtype(np.uint8)
+        elif self.name == "LPJML_SHORT":
+            return np.dtype(np.int16)
+        elif self.name == "LPJML_INT":
+            return np.dtype(np.int32)
+        elif self.name == "LPJML_FLOAT":
+            return np.dtype(np.float32)
+        else:
+            return np.dtype(np.float64)
+
     @property
     def read_fun(self):
         """Return type correct reading function"""
@@ -161,7 +149,7 @@ class LPJmlValueType(Enum):
         elif self.name == "LPJML_FLOAT":
             read_fun = read_float
         elif self.name == "LPJML_DOUBLE":
-            read_fun = read_float
+            read_fun = read_double
         else:
             raise ValueError(f"lpjml_type {self.name} does not have a read function.")
 
@@ -185,6 +173,276 @@ def read_token(channel):
     return LPJmLToken(read_int(channel))
 
 
+class LPJmLWirePlan:
+    """Byte layout of all socket outputs LPJmL sends within one year. Each
+    output is sent as READ_OUTPUT token, index and year (int32 each) followed
+    by its data block (band-major), always in the same order of outputs. The
+    whole year is received into one arena with per-output numpy views on the
+    headers and data blocks.
+
+    :param order: output indices in the order they are sent by LPJmL
+    :type order: list
+    :param ncell: number of LPJmL cells
+    :type ncell: int
+    :param bands: number of bands per output index
+    :type bands: dict
+    :param types: LPJmlValueType per output index
+    :type types: dict
+    """
+
+    header_dtype = np.dtype(np.int32)
+
+    def __init__(self, order, ncell, bands, types):
+        """Constructor method"""
+        self.order = list(order)
+        self.ncell = ncell
+        self.bands = {index: bands[index] for index in self.order}
+        self.types = {index: types[index] for index in self.order}
+
+        # compute byte offsets of headers (token, index, year) and data blocks
+        header_size = 3 * self.header_dtype.itemsize
+        offsets = self.offsets = {}
+        nbytes = 0
+        for index in self.order:
+            offsets[index] = nbytes
+            nbytes += header_size
+            nbytes += ncell * self.bands[index] * self.types[index].dtype.itemsize
+
+        self.arena = np.empty(nbytes, dtype=np.uint8)
+
+        self.headers = {
+            index: np.ndarray(
+                shape=(3,),
+                dtype=self.header_dtype,
+                buffer=self.arena,
+                offset=offsets[index],
+            )
+            for index in self.order
+        }
+        self.values = {
+            index: np.ndarray(
+                shape=(ncell, self.bands[index]),
+                dtype=self.types[index].dtype,
+                buffer=self.arena,
+                offset=offsets[index] + header_size,
+                order="F",
+            )
+            for index in self.order
+        }
+
+    @property
+    def nbytes(self):
+        """Get the number of bytes of one year of outputs
+        :getter: Number of bytes
+        :type: int
+        """
+        return self.arena.nbytes
+
+    def receive(self, channel, timings=None):
+        """Receive one year of outputs into the arena. The first token is read
+        separately to tell the time waited for LPJmL from the transfer, the
+        rest of the year is received at once. If a dictionary of timings is
+        supplied, outputs are received one by one instead and the seconds
+        spent receiving each output are stored in it (output index as key).
+        :return: seconds waited for the first token of LPJmL and seconds
+            receiving the rest of the year
+        :rtype: tuple
+        """
+        start = time.perf_counter()
+        read_into(channel, self.arena[: self.header_dtype.itemsize])
+        waited = time.perf_counter() - start
+
+        start = time.perf_counter()
+        if timings is None:
+            read_into(channel, self.arena[self.header_dtype.itemsize :])  # noqa
+            return waited, time.perf_counter() - start
+
+        offset = self.header_dtype.itemsize
+        for index in self.order:
+            output_start = time.perf_counter()
+            end = self.offsets[index] + self.nbytes_output(index)
+            read_into(channel, self.arena[offset:end])
+            timings[index] = time.perf_counter() - output_start
+            offset = end
+
+        return waited, time.perf_counter() - start
+
+    def nbytes_output(self, index):
+        """Get the number of bytes of an output (header and data block)
+        :param index: output index
+        :type index: int
+        :return: number of bytes
+        :rtype: int
+        """
+        return 3 * self.header_dtype.itemsize + self.values[index].nbytes
+
+    def validate(self, year):
+        """Check received headers (token, index, year) of all outputs against
+        the expected ones. Raises ValueError for the first invalid header.
+        """
+        headers = np.stack([self.headers[index] for index in self.order])
+        expected = np.column_stack(
+            [
+                np.full(len(self.order), LPJmLToken.READ_OUTPUT.value),
+                self.order,
+                np.full(len(self.order), year),
+            ]
+        )
+        invalid = np.flatnonzero(np.any(headers != expected, axis=1))
+        if invalid.size == 0:
+            return
+
+        token, index, received_year = headers[invalid[0]]
+        if token != LPJmLToken.READ_OUTPUT.value:
+            raise ValueError(
+                f"Received LPJmLToken {LPJmLToken(token).name} is not "
+                f"{LPJmLToken.READ_OUTPUT.name}"
+            )
+        elif index != self.order[invalid[0]]:
+            raise ValueError(
+                f"Received output index {index} does not match the expected "
+                f"output index {self.order[invalid[0]]}"
+            )
+        else:
+            raise ValueError(
+                f"The expected year: {year} does not "
+                + f"match the received year: {received_year}"
+            )
+
+    # views on the arena are rebuilt instead of being copied separately
+    def __getstate__(self):
+        return {
+            "order": self.order,
+            "ncell": self.ncell,
+            "bands": self.bands,
+            "types": self.types,
+        }
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+
+class LPJmLOutputRing:
+    """Ring of preallocated output buffers for a steady state year loop.
+    The outputs of each year are filled in place into the next slot of the
+    ring (numpy arrays and one LPJmLDataSet per slot sharing their memory),
+    so no arrays or xarray objects are allocated per year. Outputs handed
+    out are overwritten after `size` further years.
+
+    :param templates: output templates (LPJmLData) per output index
+    :type templates: dict
+    :param output_ids: output ids (names) per output index
+    :type output_ids: dict
+    :param size: number of slots (years kept before being overwritten)
+    :type size: int
+    """
+
+    def __init__(self, templates, output_ids, size=1):
+        """Constructor method"""
+        if size < 1:
+            raise ValueError(f"Size of the output ring must be >= 1, got {size}")
+        self.size = size
+        self.slot = 0
+
+        self.values = []
+        self.datasets = []
+        for _ in range(size):
+            values = {
+                index: np.empty_like(template.values)
+                for index, template in templates.items()
+            }
+            self.values.append(values)
+            self.datasets.append(
+                LPJmLDataSet(
+                    {
+                        output_ids[index]: template.copy(data=values[index])
+                        for index, template in templates.items()
+                    }
+                )
+            )
+        self.outputs = [
+            {output_ids[index]: value for index, value in values.items()}
+            for values in self.values
+        ]
+
+    def get_values(self, index):
+        """Get the values of an output (index) in the current slot
+        :param index: output index
+        :type index: int
+        :return: values with dimensions (cell, band, time)
+        :rtype: numpy.ndarray
+        """
+        return self.values[self.slot][index]
+
+    def get_outputs(self, time=None, to_xarray=True):
+        """Get all outputs of the current slot and advance the ring
+        :param time: time coordinate of the outputs (xarray only)
+        :type time: pandas.DatetimeIndex
+        :param to_xarray: if True, return LPJmLDataSet, else dictionary of
+            numpy arrays. Defaults to True
+        :type to_xarray: bool
+        :return: outputs of the current slot
+        :rtype: LPJmLDataSet or dict
+        """
+        if to_xarray:
+            outputs = self.datasets[self.slot]
+            outputs.coords["time"] = time
+        else:
+            outputs = self.outputs[self.slot]
+        self.slot = (self.slot + 1) % self.size
+        return outputs
+
+
+class LPJmLOutputs(Mapping):
+    """Lazy mapping of the outputs of a year. The decoded numpy values are
+    available at once via :attr:`arrays`, an LPJmLData with all coordinates
+    and meta data is only built when an output is accessed and then cached.
+
+    :param values: numpy values (cell, band, time) per output name
+    :type values: dict
+    :param templates: output templates (LPJmLData) per output name
+    :type templates: dict
+    :param time: time coordinate of the outputs
+    :type time: pandas.DatetimeIndex
+    """
+
+    def __init__(self, values, templates, time):
+        """Constructor method"""
+        self.arrays = values
+        self.time = time
+        self.__templates = templates
+        self.__outputs = {}
+
+    def __getitem__(self, name):
+        """Get output as LPJmLData (built on first access)"""
+        output = self.__outputs.get(name)
+        if output is None:
+            output = self.__templates[name].copy(deep=False, data=self.arrays[name])
+            output.coords["time"] = self.time
+            self.__outputs[name] = output
+        return output
+
+    def __iter__(self):
+        return iter(self.arrays)
+
+    def __len__(self):
+        return len(self.arrays)
+
+    def to_dataset(self):
+        """Get all outputs as LPJmLDataSet
+        :return: outputs of the year
+        :rtype: LPJmLDataSet
+        """
+        return LPJmLDataSet({name: self[name] for name in self})
+
+    def __repr__(self):
+        """Representation of the outputs object"""
+        return (
+            f"<pycoupler.{self.__class__.__name__}> {list(self)}"
+            f" ({self.time[0].year}, built: {list(self.__outputs)})"
+        )
+
+
 class CopanStatus(Enum):
     """Status of copan:CORE"""
 
@@ -192,21 +450,20 @@ class CopanStatus(Enum):
     COPAN_ERR: int = -1
 
 
-def opentdt(host, port):
+def opentdt(host, port, transport=None, trace=None):
     """open channel and validate connection to LPJmL"""
-    if hasattr(sys, "_called_from_test"):
-        channel = test_channel()
-    else:
-        # create an INET, STREAMing socket
-        serversocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        serversocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-        # bind the socket to a public host, and a well-known port
-        serversocket.bind((host, port))
-        # become a server socket
-        serversocket.listen(5)
-        # accept connections from outside
-        channel, address = serversocket.accept()
+    if transport is None:
+        transport = TCPTransport(host=host, port=port)
+    # wait for LPJmL to connect
+    channel = transport.accept()
+    if trace is not None:
+        channel = TraceRecorder(channel, trace)
 
+    return inittdt(channel)
+
+
+def inittdt(channel):
+    """validate connection to LPJmL on an already opened channel"""
     channel.send("1".encode())
     known_int = read_int(channel)
     num = read_int(channel)
@@ -257,13 +514,91 @@ class LPJmLCoupler:
     :type host: str
     :param port: port of the server address. Defaults to 2224
     :type port: int
+    :param transport: transport LPJmL connects to, "tcp" (host and port),
+        "unix" (Unix domain socket on the same node, LPJmL has to connect to
+        the same socket path) or "loopback" (in-process socket pair) or a
+        transport object of :mod:`pycoupler.transport`. If None, `transport`
+        (and `socket_path`) of the lpjml_settings of the coupled config are
+        used, defaulting to "tcp"
+    :type transport: str or LPJmLTransport
+    :param trace: file name of a binary trace the bytes received from and
+        sent to LPJmL are recorded into (with timestamps), to be replayed with
+        :class:`pycoupler.trace.ReplayTransport`. The trace is completely
+        written when the coupler is closed. Defaults to None (no recording)
+    :type trace: str
+    :param prefetch: if True, outputs of the next year are received in a
+        background thread into a second set of output buffers as soon as LPJmL
+        sends them, while the outputs of the current year are processed.
+        Defaults to False
+    :type prefetch: bool
+    :param send_queue: if True, send_input returns immediately and inputs are
+        serialized and sent in a background thread. Errors are raised on the
+        next call of send_input or read_output. Supplied input arrays must not
+        be modified until read_output of the same year is called.
+        Defaults to False
+    :type send_queue: bool
+    :param upcast: if True, outputs (and static outputs) are upcast to
+        Python types (float64 or int64). Else they are kept in the native
+        data type sent by LPJmL (int16, int32, float32 or float64).
+        Defaults to False
+    :type upcast: bool
+    :param output_ring: number of preallocated output buffers to be filled
+        in turn by read_output (steady state mode, see
+        :class:`LPJmLOutputRing`). Returned outputs (numpy or xarray) are
+        reused and overwritten after `output_ring` further years, copy them
+        to keep them longer. Defaults to None (new outputs per year)
+    :type output_ring: int
+    :param recent_years: number of recent years of the socket outputs to be
+        kept in circular buffers, available as :attr:`recent_outputs` (see
+        :class:`pycoupler.history.LPJmLRingHistory`). Defaults to None
+    :type recent_years: int
+    :param cell_mask: cells outputs are compacted to right after they are
+        received, so that outputs, templates, histories and writers only hold
+        the selected cells. Either cell ids or a dictionary with one of the
+        keys "cell" (cell ids), "country" or "region" (codes of the static
+        outputs) or "bbox" (lon_min, lat_min, lon_max, lat_max), e.g.
+        ``{"country": [56, 57]}``. Inputs are still sent for all cells.
+        Defaults to None (all cells)
+    :type cell_mask: list or dict
+    :param output_timings: if True, outputs of a year are received one by one
+        to record the receive time of each output in :attr:`stats`. Else a
+        year is received at once and its receive time recorded for all
+        outputs ("outputs"). Defaults to False
+    :type output_timings: bool
     """
 
-    def __init__(self, config_file, version=3, host="", port=2224):
+    def __init__(
+        self,
+        config_file,
+        version=3,
+        host="",
+        port=2224,
+        prefetch=False,
+        send_queue=False,
+        transport=None,
+        trace=None,
+        output_ring=None,
+        upcast=False,
+        recent_years=None,
+        cell_mask=None,
+        output_timings=False,
+    ):
         """Constructor method"""
-
-        # initiate socket connection to LPJmL
-        self.__init_channel(version, host, port)
+        self.__output_timings = output_timings
+        self.__trace = trace
+        self.__upcast = upcast
+        self.__writers = []
+        self.__reducers = []
+        self.__reductions = {}
+        self.__aggregators = {}
+        self.__input_buffers = {}
+        self.__stats = LPJmLCouplerStats()
+        self.__prefetch = prefetch
+        self.__send_queue = send_queue
+        # single background thread for all channel operations (keeps order)
+        self._channel_executor = None
+        self._prefetch_future = None
+        self._send_future = None
 
         # read configuration file
         self.__config = read_config(config_file)
@@ -274,36 +609,123 @@ class LPJmLCoupler:
             )
             self.__config.sim_path = os.path.join(f"{os.environ['TEST_PATH']}/data/")
 
+        # initiate socket connection to LPJmL
+        self.__transport = self.__get_transport(transport, host, port)
+        self.__init_channel(version, host, port)
+
         # initiate coupling, get number of cells, inputs and outputs and verify
         self.__init_coupling()
 
         # communicate status, if valid start LPJmL simulation
         self.__communicate_status()
 
-        # create templates for static output data
-        self.__init_static_data()
-
         # Read static outputs
         self.__iterate_operation(
             length=len(self.__static_ids),
             fun=self.__read_static_data,
             token=LPJmLToken.READ_OUTPUT,
         )
+
+        # add longitude and latitude coordinates to static outputs
+        for static_output in self.__static_ids.values():
+            getattr(self, static_output).coords["lon"] = (
+                ("cell",),
+                self.grid.data[:, 0],
+            )
+            getattr(self, static_output).coords["lat"] = (
+                ("cell",),
+                self.grid.data[:, 1],
+            )
         # Subtract static inputs from the ones that are read within simulation
         self.__noutput_sim -= len(self.__static_ids)
 
+        # Positions of the cells outputs are compacted to (None for all cells)
+        self.__cell_index = self.__select_cells(cell_mask)
+
         # Create output templates
         self.__output_templates = {
             output_key: self._create_xarray_template(int(output_key))
             for output_key in self.__output_ids
         }
 
+        # Order of outputs sent per year, compiled into a wire plan after the
+        #   first year has been read
+        self.__output_order = []
+        self.__output_plan = None
+        # Second wire plan (arena) to receive the next year into (prefetch)
+        self.__prefetch_plan = None
+
+        # Create buffers to receive outputs in wire data type and layout
+        self.__output_buffers = {
+            output_key: np.empty(
+                shape=(self.__ncell, self.__output_bands[output_key]),
+                dtype=self.__output_types[output_key].dtype,
+                order="F",
+            )
+            for output_key in self.__output_ids
+        }
+        # Buffers of the outputs compacted to the selected cells
+        if self.__cell_index is not None:
+            self.__masked_buffers = {
+                output_key: np.empty(
+                    shape=(len(self.__cell_index), self.__output_bands[output_key]),
+                    dtype=self.__output_types[output_key].dtype,
+                    order="F",
+                )
+                for output_key in self.__output_ids
+            }
+        else:
+            self.__masked_buffers = None
+
+        # Time coordinates of all output years, created once
+        output_years = range(self.__config.outputyear, self.__config.lastyear + 1)
+        output_times = pd.date_range(
+            str(output_years[0]), periods=len(output_years), freq="YE"
+        )
+        self.__output_times = {
+            year: output_times[step : step + 1]  # noqa
+            for step, year in enumerate(output_years)
+        }
+
+        # Preallocated outputs to be reused each year (steady state mode)
+        if output_ring is not None:
+            self.__output_ring = LPJmLOutputRing(
+                {
+                    index: template
+                    for index, template in self.__output_templates.items()
+                    if index not in self.__static_ids
+                },
+                self.__output_ids,
+                size=output_ring,
+            )
+        else:
+            self.__output_ring = None
+
+        # Last years of outputs in circular buffers
+        if recent_years is not None:
+            self.__recent = LPJmLRingHistory(
+                {
+                    name: self.__output_templates[index]
+                    for index, name in self.__output_ids.items()
+                    if index not in self.__static_ids
+                },
+                recent_years,
+            )
+            self.__writers.append(self.__recent)
+        else:
+            self.__recent = None
+
     # callled when writing class as pickle - exclude channel (socket) attribute
     def __getstate__(self):
         # Create a dictionary of the attributes to pickle, excluding the socket
         state = self.__dict__.copy()
         if "_channel" in state:
             del state["_channel"]  # Exclude the socket
+        # Exclude the background thread and its pending operations
+        state["_channel_executor"] = None
+        state["_prefetch_future"] = None
+        state["_send_future"] = None
+        state["_LPJmLCoupler__writers"] = []
         return state
 
     @property
@@ -322,6 +744,62 @@ class LPJmLCoupler:
         """
         return self.__ncell
 
+    @property
+    def cell_mask(self):
+        """Get the ids of the cells outputs are compacted to, if `cell_mask`
+        is set
+        :getter: Ids of the selected cells
+        :type: numpy.ndarray
+        """
+        if self.__cell_index is None:
+            return None
+        return self.grid.coords["cell"].values[self.__cell_index]
+
+    @property
+    def ninput(self):
+        """Get the number of LPJmL input streams
+        :getter: Number of input streams
+        :type: int
+        """
+        return self.__ninput
+
+    @property
+    def stats(self):
+        """Get per-year timings and byte counters of the coupling
+        :getter: Coupling statistics
+        :type: LPJmLCouplerStats
+        """
+        return self.__stats
+
+    @property
+    def recent_outputs(self):
+        """Get the recent years of the socket outputs (oldest first) as views
+        on the circular buffers, if `recent_years` is set
+        :getter: Recent years of outputs
+        :type: LPJmLDataSet
+        """
+        if self.__recent is None:
+            return None
+        return self.__recent.to_dataset()
+
+    @property
+    def reductions(self):
+        """Get the reductions of the last year read, computed by the reducers
+        registered with :meth:`add_reducer`
+        :getter: Reductions by reducer name
+        :type: dict
+        """
+        return self.__reductions
+
+    @property
+    def wire_plan(self):
+        """Get the wire plan of the socket outputs sent per year. It is
+        compiled after the first year of outputs has been read.
+        :getter: Wire plan or None if not compiled yet
+        :type: LPJmLWirePlan
+        """
+        return self.__output_plan
+
     @property
     def operations_left(self):
         """Get the operations left for the current simulation year
@@ -435,6 +913,8 @@ class LPJmLCoupler:
 
     def code_to_name(self, to_iso_alpha_3=False):
         """Convert the cell indices to cell names"""
+        # aggregators are rebuilt with the names as group codes
+        self.__aggregators = {}
         for static_output in self.__static_ids.values():
 
             if static_output not in ["country", "region"]:
@@ -475,40 +955,297 @@ class LPJmLCoupler:
             arrays with dimensions (ncell, nband)
         :rtype: dict
         """
-        # read all historic outputs
-        hist_years = list()
-        for year in self.get_historic_years():
-            hist_years.append(year)
-            if year == self.__config.outputyear:
-                output_dict = self.read_output(year=year, to_xarray=False)
-            elif year > self.__config.outputyear:
-                output_dict = append_to_dict(
-                    output_dict, self.read_output(year=year, to_xarray=False)
-                )
+        # historic years with outputs are known up front, preallocate the
+        #   history (cell, band, time) of each output and fill it year by year
+        hist_years = [
+            year
+            for year in self.get_historic_years()
+            if year >= self.__config.outputyear
+        ]
+        output_dict = {
+            name: self._create_xarray_template(index, time_length=len(hist_years))
+            for index, name in self.__output_ids.items()
+            if index not in self.__static_ids
+        }
+        hist_times = pd.date_range(
+            start=str(hist_years[0]), periods=len(hist_years), freq="YE"
+        )
+        for output in output_dict.values():
+            output.coords["time"] = hist_times
 
-        for key in output_dict:
-            if key in output_dict:
-                index = [
-                    item[0] for item in self.__output_ids.items() if item[1] == key
-                ][0]
-                lpjml_output = self._create_xarray_template(
-                    index, time_length=len(hist_years)
-                )
-
-                lpjml_output.coords["time"] = pd.date_range(
-                    start=str(hist_years[0]), end=str(hist_years[-1] + 1), freq="YE"
-                )
-                lpjml_output.data = output_dict[key]
-                output_dict[key] = lpjml_output
+        # read all historic outputs (not via self.read_output to be usable by
+        #   subclasses with an asynchronous read_output)
+        for step, year in enumerate(hist_years):
+            outputs = LPJmLCoupler.read_output(self, year=year, to_xarray=False)
+            for key, values in outputs.items():
+                output_dict[key].data[..., step] = values[..., 0]
 
         if to_xarray:
             return LPJmLDataSet(output_dict)
         else:
             return output_dict
 
+    def open_writer(self, file_name, outputs=None, **kwargs):
+        """Open a writer appending the outputs of each year read from now on
+        to a NetCDF4 file (in a background thread), see
+        :class:`pycoupler.writer.LPJmLOutputWriter`. The writer is closed with
+        the coupler.
+        :param file_name: file name (including relative/absolute path) of the
+            NetCDF4 file to be written
+        :type file_name: str
+        :param outputs: names of the outputs to be written. Defaults to None
+            (all socket outputs)
+        :type outputs: list
+        :param kwargs: further arguments of LPJmLOutputWriter (e.g. chunks)
+        :return: writer
+        :rtype: LPJmLOutputWriter
+        """
+        writer = LPJmLOutputWriter(
+            file_name,
+            {
+                name: self.__output_templates[index]
+                for index, name in self.__output_ids.items()
+                if index not in self.__static_ids
+                and (outputs is None or name in outputs)
+            },
+            **kwargs,
+        )
+        self.__writers.append(writer)
+        return writer
+
+    def open_history(self, path=None, outputs=None, nyear=None, layout=HISTORY_DIMS):
+        """Open a history keeping the outputs of each year read from now on in
+        memory-mapped files, see :class:`pycoupler.history.LPJmLMemmapHistory`.
+        :param path: directory of the memory-mapped files. Defaults to None
+            (new temporary directory)
+        :type path: str
+        :param outputs: names of the outputs to be kept. Defaults to None
+            (all socket outputs)
+        :type outputs: list
+        :param nyear: number of years the history is allocated for, at least
+            all remaining output years. Defaults to None (all remaining output
+            years)
+        :type nyear: int
+        :param layout: order of the dimensions in the files. Defaults to
+            ("time", "band", "cell")
+        :type layout: tuple
+        :return: history
+        :rtype: LPJmLMemmapHistory
+        """
+        # check capacity up front, a full history would fail after a year has
+        #   been received and leave the coupler out of sync with LPJmL
+        nyear_left = (
+            self.__config.lastyear - max(self.__sim_year, self.__config.outputyear) + 1
+        )
+        if nyear is None:
+            nyear = nyear_left
+        elif nyear < nyear_left:
+            raise ValueError(
+                f"History of {nyear} years cannot hold the {nyear_left} output"
+                " years left."
+            )
+        history = LPJmLMemmapHistory(
+            {
+                name: self.__output_templates[index]
+                for index, name in self.__output_ids.items()
+                if index not in self.__static_ids
+                and (outputs is None or name in outputs)
+            },
+            nyear=nyear,
+            path=path,
+            layout=layout,
+        )
+        self.__writers.append(history)
+        return history
+
+    def add_reducer(
+        self, output, how="sum", dim="band", by=None, weights=None, name=None
+    ):
+        """Register a reducer of a socket output, applied to the received
+        values of each year band block by band block, see
+        :class:`pycoupler.reducers.LPJmLReducer`. Reductions are returned by
+        read_output with `reduce_only=True` or available as :attr:`reductions`.
+        :param output: name of the output to be reduced
+        :type output: str
+        :param how: reduction, "sum" or "mean". Defaults to "sum"
+        :type how: str
+        :param dim: dimension to be reduced, "band" or "cell".
+            Defaults to "band"
+        :type dim: str
+        :param by: static output (e.g. "country" or "region") or array of
+            group codes per cell to reduce cells group-wise. Defaults to None
+        :type by: str or numpy.ndarray
+        :param weights: static output (e.g. "terr_area") or array of weights
+            per cell. Defaults to None
+        :type weights: str or numpy.ndarray
+        :param name: name of the reduction. Defaults to None
+            ("{output}_{how}_{by or dim}")
+        :type name: str
+        :return: reducer
+        :rtype: LPJmLReducer
+        """
+        outputs = {
+            output_name: index
+            for index, output_name in self.__output_ids.items()
+            if index not in self.__static_ids
+        }
+        if output not in outputs:
+            raise ValueError(
+                f"Output {output} is not a socket output, choose from"
+                f" {list(outputs)}."
+            )
+        if by is not None:
+            dim = "cell"
+        if name is None and isinstance(by, str):
+            name = f"{output}_{how}_{by}"
+
+        reducer = LPJmLReducer(
+            output,
+            how=how,
+            dim=dim,
+            groups=self.__get_static_values(by),
+            weights=self.__get_static_values(weights),
+            name=name,
+        )
+        if any(other.name == reducer.name for other in self.__reducers):
+            raise ValueError(f"Reduction {reducer.name} already registered.")
+        self.__reducers.append(reducer)
+        return reducer
+
+    def get_aggregator(self, by="country", weights=None, masked=True):
+        """Get the aggregator of cells to the groups of a static output, see
+        :class:`pycoupler.aggregation.LPJmLAggregator`. Its sparse operators
+        are built once and cached.
+        :param by: static output the cells are grouped by ("country" or
+            "region"). Defaults to "country"
+        :type by: str
+        :param weights: static output with cell weights for area weighted
+            aggregation (e.g. "terr_area"). Defaults to None
+        :type weights: str
+        :param masked: if True, only the cells of the cell mask (if set) are
+            aggregated, as the outputs. Else all cells, as the inputs.
+            Defaults to True
+        :type masked: bool
+        :return: aggregator
+        :rtype: LPJmLAggregator
+        """
+        masked = masked and self.__cell_index is not None
+        aggregator = self.__aggregators.get((by, weights, masked))
+        if aggregator is None:
+            aggregator = self.__aggregators[(by, weights, masked)] = LPJmLAggregator(
+                self.__get_static_values(by, masked=masked),
+                weights=self.__get_static_values(weights, masked=masked),
+                name=by,
+            )
+        return aggregator
+
+    def aggregate(self, output, by="country", how="sum"):
+        """Aggregate output(s) of cells to countries or regions with band and
+        time dimensions preserved, see
+        :meth:`pycoupler.aggregation.LPJmLAggregator.aggregate`.
+        :param output: output(s) with dimension cell (e.g. of read_output)
+        :type output: LPJmLData or LPJmLDataSet or numpy.ndarray
+        :param by: static output the cells are grouped by ("country" or
+            "region"). Defaults to "country"
+        :type by: str
+        :param how: aggregation, "sum", "mean" or "area_weighted" (mean
+            weighted by the static output terr_area). Defaults to "sum"
+        :type how: str
+        :return: aggregated output(s) with dimension `by` instead of cell
+        :rtype: LPJmLData or LPJmLDataSet or numpy.ndarray
+        """
+        weights = "terr_area" if how == "area_weighted" else None
+        return self.get_aggregator(by, weights=weights).aggregate(output, how=how)
+
+    def get_input_buffer(self, name):
+        """Get the reusable buffer of an input with dimensions (ncell, nband)
+        in the data type and memory layout sent to LPJmL, so that it is sent
+        without conversion by send_input. The same buffer is returned for
+        every call, fill it in place (e.g. with :meth:`scatter`).
+        :param name: name of the input (e.g. "with_tillage")
+        :type name: str
+        :return: input buffer
+        :rtype: numpy.ndarray
+        """
+        buffer = self.__input_buffers.get(name)
+        if buffer is None:
+            indices = {
+                input_name: index for index, input_name in self.__input_ids.items()
+            }
+            if name not in indices:
+                raise ValueError(
+                    f"Input {name} is not a socket input, choose from"
+                    f" {list(indices)}."
+                )
+            index = indices[name]
+            buffer = self.__input_buffers[name] = np.zeros(
+                (self.__ncell, LPJmLInputType(index).nband),
+                dtype=self.__input_types[index].dtype,
+                order="F",
+            )
+        return buffer
+
+    def scatter(self, values, by="country", input=None, weights=None):
+        """Scatter values per country or region to all cells, e.g. decisions
+        per country to the inputs of LPJmL, see
+        :meth:`pycoupler.aggregation.LPJmLAggregator.scatter`.
+
+        >>> tillage = coupler.scatter(country_tillage, input="with_tillage")
+        >>> coupler.send_input({"with_tillage": tillage}, year)
+
+        :param values: values with countries/regions as first dimension (in
+            the order of their codes) or dictionary of values per code
+        :type values: numpy.ndarray or dict
+        :param by: static output of the groups ("country" or "region").
+            Defaults to "country"
+        :type by: str
+        :param input: name of the input the values are written into its
+            reusable input buffer (see :meth:`get_input_buffer`), float values
+            of integer inputs have to be rounded first. Defaults to None (new
+            array)
+        :type input: str
+        :param weights: static output (e.g. "terr_area") or array of weights
+            per cell values are multiplied by. Defaults to None
+        :type weights: str or numpy.ndarray
+        :return: values with dimension (ncell, ...) or the input buffer
+        :rtype: numpy.ndarray
+        """
+        return self.get_aggregator(by, masked=False).scatter(
+            values,
+            weights=self.__get_static_values(weights, masked=False),
+            out=None if input is None else self.get_input_buffer(input),
+        )
+
+    def __get_static_values(self, static, masked=True):
+        """Get values per cell of static output (by name) or array"""
+        if not isinstance(static, str):
+            return static
+        if static not in self.__static_ids.values() or static == "grid":
+            raise ValueError(
+                f"Static output {static} is not available, choose from"
+                f" {[name for name in self.__static_ids.values() if name != 'grid']}."
+            )
+        values = getattr(self, static).values[:, 0]
+        if masked and self.__cell_index is not None:
+            values = values[self.__cell_index]
+        return values
+
     def close(self):
-        """Close socket channel"""
-        self._channel.close()
+        """Close socket channel (and writers). All writers are closed even if
+        closing one of them fails, the first error is raised afterwards.
+        """
+        writers, self.__writers = self.__writers, []
+        errors = []
+        for close in [self._channel.close] + [writer.close for writer in writers]:
+            try:
+                close()
+            except Exception as error:
+                errors.append(error)
+        if self._channel_executor is not None:
+            self._channel_executor.shutdown(wait=False)
+            self._channel_executor = None
+        if errors:
+            raise errors[0]
 
     def send_input(self, input_dict, year):
         """Send input data of iterated year as dictionary to LPJmL. Dictionary
@@ -527,77 +1264,181 @@ class LPJmLCoupler:
         :param year: supply year for validation
         :type year: int
         """
-        # iteration step check - if number of iterations left exceed simulation
-        #   steps (analogous to years left)
-        # Year check - if procvided year matches internal simulation year
-        if year != self.__sim_year:
-            raise ValueError(
-                f"Year {year} not matches simulated year {self.__sim_year}"
+        self.__stats.begin_call(year)
+        self.__wait_send()
+        self._validate_operation(LPJmLToken.SEND_INPUT, year)
+
+        if self.__send_queue:
+            # hand off inputs to the background thread and return immediately
+            self._send_future = self.__get_channel_executor().submit(
+                self.__send_inputs, input_dict, year
             )
-        operations = self.operations_left
-
-        # Check if read_output operation valid
-        if not operations or LPJmLToken.SEND_INPUT not in operations:
-            raise IndexError(f"No send_input operation left for year {year}")
-        elif operations.pop(0) != LPJmLToken.SEND_INPUT:
-            raise IndexError(f"Invalid operation order. Expected read_output")
-
-        # iterate over outputs for private send_input_data
-        self.__iterate_operation(
-            length=self.__ninput,
-            fun=self.__send_input_data,
-            token=LPJmLToken.SEND_INPUT,
-            args={"data": input_dict, "validate_year": year},
-        )
-
-        self.__year_send_input = year
-
-        # check if all operations have been performed and increase sim_year
-        if not self.operations_left:
-            self.__sim_year += 1
+        else:
+            self.__send_inputs(input_dict, year)
+
+        self._complete_operation(LPJmLToken.SEND_INPUT, year)
+        self.__stats.end_call()
+
+    def __send_inputs(self, input_dict, year):
+        """Send all inputs LPJmL requests for year"""
+        # iterate over inputs for private send_input_data
+        for _ in range(self.__ninput):
+            self._send_input_step(input_dict, year)
+
+    def __wait_send(self):
+        """Wait for queued inputs to be sent, raise errors of sending"""
+        if self._send_future is not None:
+            future, self._send_future = self._send_future, None
+            future.result()
+
+    def __get_channel_executor(self):
+        """Get (and start) the background thread for channel operations"""
+        if self._channel_executor is None:
+            self._channel_executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="pycoupler-channel"
+            )
+        return self._channel_executor
 
-    def read_output(self, year, to_xarray=True):
+    def read_output(self, year, to_xarray=True, lazy=False, reduce_only=False):
         """Read LPJmL output data of the specified year.
 
         :param year: Year for which output data is to be read.
         :type year: int
         :param to_xarray: If True, output is returned as xarray.DataArray.
         :type to_xarray: bool
+        :param lazy: If True (and to_xarray), outputs are returned as
+            :class:`LPJmLOutputs` mapping, building xarray objects only for
+            the outputs accessed. Defaults to False
+        :type lazy: bool
+        :param reduce_only: If True, only the reductions of the registered
+            reducers (see :meth:`add_reducer`) are returned and outputs are
+            not assigned. Defaults to False
+        :type reduce_only: bool
         :return: Dictionary with output id/name as keys and outputs in the form
-                of numpy.array or xarray.DataArray.
-        :rtype: dict or xarray.DataArray
+                of numpy.array or xarray.DataArray (or reduction names and
+                reductions as numpy.array).
+        :rtype: dict or xarray.DataArray or LPJmLOutputs
         """
-        # Validate the year
-        if year != self.__sim_year:
-            raise ValueError(
-                f"Year {year} does not match simulated year {self.__sim_year}"
-            )
-
-        # Check if read_output operation is valid
-        if (
-            not self.operations_left
-            or self.operations_left[0] != LPJmLToken.READ_OUTPUT
-        ):
-            raise IndexError(f"No read_output operation left for year {year}")
+        lazy = lazy and to_xarray
+        if lazy:
+            # decode to numpy only, xarray objects are built on access
+            to_xarray = False
+        self.__stats.begin_call(year)
+        self.__wait_send()
+        self._validate_operation(LPJmLToken.READ_OUTPUT, year)
 
         # Perform read_output operation
-        lpjml_output = self.__iterate_operation(
-            length=self.__noutput_sim,
-            fun=self.__read_output_data,
-            token=LPJmLToken.READ_OUTPUT,
-            args={"validate_year": year, "to_xarray": to_xarray},
-            appendix=True,
-        )
-        if to_xarray:
+        if self.__output_plan is None:
+            # read token by token to record the order outputs are sent in
+            lpjml_output = self.__iterate_operation(
+                length=self.__noutput_sim,
+                fun=self.__read_output_data,
+                token=LPJmLToken.READ_OUTPUT,
+                args={"validate_year": year, "to_xarray": to_xarray},
+                appendix=True,
+            )
+            self.__write_outputs(year)
+            self.__reduce_outputs(year)
+            self.__compile_output_plan()
+        else:
+            lpjml_output = self.__read_output_plan(
+                validate_year=year, to_xarray=to_xarray, assign=not reduce_only
+            )
+            self.__write_outputs(year)
+            self.__reduce_outputs(year)
+
+        if reduce_only:
+            lpjml_output = self.__reductions
+        elif self.__output_ring is not None:
+            lpjml_output = self.__output_ring.get_outputs(
+                time=self.__output_times[year], to_xarray=to_xarray
+            )
+        elif to_xarray:
             lpjml_output = LPJmLDataSet(lpjml_output)
 
-        self.__year_read_output = year
+        if lazy and not reduce_only:
+            lpjml_output = LPJmLOutputs(
+                lpjml_output,
+                {
+                    name: self.__output_templates[index]
+                    for index, name in self.__output_ids.items()
+                    if name in lpjml_output
+                },
+                self.__output_times[year],
+            )
+
+        self._complete_operation(LPJmLToken.READ_OUTPUT, year)
+        self.__stats.end_call()
+
+        return lpjml_output
+
+    def _validate_operation(self, token, year):
+        """Check if year matches the simulated year and if the operation
+        (LPJmLToken.SEND_INPUT or LPJmLToken.READ_OUTPUT) is the next one left.
+        """
+        operations = self.operations_left
+
+        if token == LPJmLToken.SEND_INPUT:
+            # Year check - if procvided year matches internal simulation year
+            if year != self.__sim_year:
+                raise ValueError(
+                    f"Year {year} not matches simulated year {self.__sim_year}"
+                )
+            # Check if send_input operation valid
+            if not operations or LPJmLToken.SEND_INPUT not in operations:
+                raise IndexError(f"No send_input operation left for year {year}")
+            elif operations.pop(0) != LPJmLToken.SEND_INPUT:
+                raise IndexError(f"Invalid operation order. Expected read_output")
+        else:
+            # Validate the year
+            if year != self.__sim_year:
+                raise ValueError(
+                    f"Year {year} does not match simulated year {self.__sim_year}"
+                )
+            # Check if read_output operation is valid
+            if not operations or operations[0] != LPJmLToken.READ_OUTPUT:
+                raise IndexError(f"No read_output operation left for year {year}")
+
+    def _complete_operation(self, token, year):
+        """Mark operation as performed for year and increase sim_year if all
+        operations of the year have been performed.
+        """
+        if token == LPJmLToken.SEND_INPUT:
+            self.__year_send_input = year
+        else:
+            self.__year_read_output = year
 
-        # If all operations have been performed, increase sim_year
+        # check if all operations have been performed and increase sim_year
         if not self.operations_left:
             self.__sim_year += 1
 
-        return lpjml_output
+        # start receiving the outputs of the next year if they are the next
+        #   data LPJmL sends
+        if (
+            self.__prefetch
+            and self.__output_plan is not None
+            and self.__sim_year <= self.__config.lastyear
+            and self.operations_left == [LPJmLToken.READ_OUTPUT]
+        ):
+            self.__start_prefetch()
+
+    def _output_streams(self):
+        """Get the streams the receive time of a year of outputs is recorded
+        for, as (output index, name) in the order LPJmL sends them. All
+        outputs at once (None, "outputs") unless output_timings.
+        """
+        if not self.__output_timings:
+            return [(None, "outputs")]
+        return [(index, self.__output_ids[index]) for index in self.__output_plan.order]
+
+    def _send_input_step(self, input_dict, year):
+        """Send the input LPJmL requests next (SEND_INPUT token, index, year)"""
+        self.__iterate_operation(
+            length=1,
+            fun=self.__send_input_data,
+            token=LPJmLToken.SEND_INPUT,
+            args={"data": input_dict, "validate_year": year},
+        )
 
     def read_input(self, start_year=None, end_year=None, copy=True):
         """Read coupled input data from netcdf files and copy them to the
@@ -797,9 +1638,31 @@ class LPJmLCoupler:
             if os.path.isfile(f"{temp_dir}/2_{file_name_tmp}"):
                 os.remove(f"{temp_dir}/2_{file_name_tmp}")
 
+    @property
+    def transport(self):
+        """Get the transport LPJmL is connected with
+        :getter: Transport object
+        :type: LPJmLTransport
+        """
+        return self.__transport
+
+    def _open_channel(self, host, port):
+        """Open socket channel and validate connection to LPJmL"""
+        return opentdt(host, port, transport=self.__transport, trace=self.__trace)
+
+    def __get_transport(self, transport, host, port):
+        path = None
+        if transport is None:
+            # transport settings of coupled config (if available)
+            settings = getattr(self.__config, "coupled_config", None)
+            settings = getattr(settings, "lpjml_settings", None)
+            transport = getattr(settings, "transport", "tcp")
+            path = getattr(settings, "socket_path", None)
+        return get_transport(transport, host=host, port=port, path=path)
+
     def __init_channel(self, version, host, port):
         # open/initialize socket channel
-        self._channel = opentdt(host, port)
+        self._channel = self._open_channel(host, port)
         # Check coupler protocol version
         self.version = read_int(self._channel)
         if self.version != version:
@@ -849,8 +1712,12 @@ class LPJmLCoupler:
                 f" configuration."
             )
         else:
-            # init lists to be filled with nbands, types per output
-            self.__input_types = [-1] * len(self.config.input.__dict__)
+            # init lists to be filled with nbands, types per output (indexed by
+            #   input id)
+            self.__input_types = [-1] * max(
+                len(self.config.input.__dict__),
+                max(input_type.value for input_type in LPJmLInputType) + 1,
+            )
 
             # get input indices
             self.__input_ids = {
@@ -909,9 +1776,14 @@ class LPJmLCoupler:
     def __iterate_operation(self, length, fun, token, args=None, appendix=False):
         """Iterate reading/sending operation for sequence of inputs and/or outputs"""
         results = {}
-        for _ in range(length):
+        year = args.get("validate_year") if args else None
+        for step in range(length):
             # check if read token matches expected token and return read token
+            start = time.perf_counter()
             token_check, received_token = self.__check_token(token)
+            if step == 0 and year is not None:
+                # time blocked waiting for LPJmL
+                self.__stats.add_time(year, "lpjml_s", time.perf_counter() - start)
             if not token_check:
                 self.close()
                 raise ValueError(
@@ -1012,94 +1884,131 @@ class LPJmLCoupler:
                 + f"LPJmLToken {LPJmLToken.GET_STATUS} expected."
             )
 
-    def __init_static_data(self):
-
-        for static_id in self.__static_ids:
-
-            # Create empty array for of corresponding type
-            tmp_static = np.zeros(
-                shape=(self.__ncell, self.__output_bands[static_id]),
-                dtype=self.__output_types[static_id].type,
+    def __create_static_data(self, index, data):
+        """Create LPJmLData object for static output data (cell, band)"""
+        # grid data is handled differently with coords being assigned
+        if self.__static_ids[index] == "grid":
+            static_data = LPJmLData(
+                data=data,
+                dims=("cell", "coord"),
+                coords=dict(
+                    cell=np.arange(self.__config.startgrid, self.__config.endgrid + 1),
+                    coord=["lon", "lat"],
+                ),
+                name="grid",
             )
 
-            # Fill array with missing values
-            if self.__output_types[static_id].type == int:
-                tmp_static[:] = -9999
-            else:
-                tmp_static[:] = np.nan
-
-            # grid data is handled differently with coords being assigned
-            if self.__static_ids[static_id] == "grid":
-                tmp_static = LPJmLData(
-                    data=tmp_static,
-                    dims=("cell", "coord"),
-                    coords=dict(
-                        cell=np.arange(
-                            self.__config.startgrid, self.__config.endgrid + 1
-                        ),
-                        coord=["lon", "lat"],
-                    ),
-                    name="grid",
-                )
-
-            # other static data is handled like common output data without time
-            else:
-                tmp_static = LPJmLData(
-                    data=tmp_static,
-                    dims=("cell", "band"),
-                    coords=dict(
-                        cell=np.arange(
-                            self.__config.startgrid, self.__config.endgrid + 1
-                        ),
-                        band=np.arange(self.__output_bands[static_id]),
-                    ),
-                    name=self.__static_ids[static_id],
-                )
+        # other static data is handled like common output data without time
+        else:
+            static_data = LPJmLData(
+                data=data,
+                dims=("cell", "band"),
+                coords=dict(
+                    cell=np.arange(self.__config.startgrid, self.__config.endgrid + 1),
+                    band=np.arange(self.__output_bands[index]),
+                ),
+                name=self.__static_ids[index],
+            )
 
-            setattr(self, f"{self.__static_ids[static_id]}", tmp_static)
+        return static_data
 
     def __read_static_data(self):
         """Read static data to be called within initialization of coupler.
-        Currently only grid data supported
+        Values of static outputs are sent cell by cell (all bands of cell 1, all
+        bands of cell 2, ...) and are read as one block.
         """
         index = read_int(self._channel)
 
-        read_fun = self.__output_types[index].read_fun
+        lpjml_type = self.__output_types[index]
         meta_data = self.__read_meta_output(index)
 
-        # iterate over ncell and read + assign lon and lat values
-        for cell in range(0, self.__ncell):
-            for band in range(0, self.__output_bands[index]):
-                getattr(self, f"{self.__static_ids[index]}")[cell, band] = (
-                    read_fun(self._channel) * meta_data.scalar
-                )
+        # read all values at once and apply scalar to the whole block
+        values = read_array(
+            self._channel, lpjml_type.dtype, self.__ncell * self.__output_bands[index]
+        ).reshape(self.__ncell, self.__output_bands[index])
+        dtype = self.__get_output_dtype(lpjml_type)
+        if meta_data.scalar != 1:
+            # scaled values are floating point values
+            dtype = np.result_type(dtype, np.float32)
+            values = values * np.asarray(meta_data.scalar, dtype=dtype)
+        values = values.astype(dtype, copy=False)
+
+        static_data = self.__create_static_data(index, values)
 
         # add meta data to xarray
-        getattr(self, f"{self.__static_ids[index]}").add_meta(meta_data)
+        static_data.add_meta(meta_data)
 
-        # add longitude and latitude coodinates to xarray
-        getattr(self, f"{self.__static_ids[index]}").coords["lon"] = (
-            ("cell",),
-            self.grid.data[:, 0],
-        )
-        getattr(self, f"{self.__static_ids[index]}").coords["lat"] = (
-            ("cell",),
-            self.grid.data[:, 1],
-        )
+        setattr(self, f"{self.__static_ids[index]}", static_data)
+
+    def __select_cells(self, cell_mask):
+        """Get positions of the cells selected by the cell mask"""
+        if cell_mask is None:
+            return None
+        cells = self.grid.coords["cell"].values
+
+        if not isinstance(cell_mask, dict):
+            cell_mask = {"cell": cell_mask}
+        if len(cell_mask) != 1:
+            self.close()
+            raise ValueError(
+                f"Cell mask has to be given by one key, got {list(cell_mask)}."
+            )
+        key, value = next(iter(cell_mask.items()))
+
+        if key == "cell":
+            selected = np.isin(cells, value)
+        elif key in ["country", "region"] and key in self.__static_ids.values():
+            selected = np.isin(getattr(self, key).values[:, 0], value)
+        elif key == "bbox":
+            lon_min, lat_min, lon_max, lat_max = value
+            lon = self.grid.coords["lon"].values
+            lat = self.grid.coords["lat"].values
+            selected = (
+                (lon >= lon_min)
+                & (lon <= lon_max)
+                & (lat >= lat_min)
+                & (lat <= lat_max)
+            )
+        else:
+            self.close()
+            raise ValueError(
+                f"Unsupported cell mask {key}, choose from cell, country, region"
+                " (static outputs) or bbox."
+            )
+
+        cell_index = np.flatnonzero(selected)
+        if cell_index.size == 0:
+            self.close()
+            raise ValueError(f"Cell mask {cell_mask} does not select any cell.")
+        return cell_index
+
+    def __get_output_dtype(self, lpjml_type):
+        """Get numpy data type outputs of a LPJmlValueType are kept in"""
+        if self.__upcast:
+            return np.dtype(lpjml_type.type)
+        return lpjml_type.dtype
 
     def _create_xarray_template(self, index, time_length=1):
         """Create xarray template for output data"""
         bands = self.__output_bands[index]
+        cells = np.arange(self.__config.startgrid, self.__config.endgrid + 1)
+        lon = self.grid.coords["lon"].values
+        lat = self.grid.coords["lat"].values
+        if self.__cell_index is not None:
+            # template of the selected cells only
+            cells = cells[self.__cell_index]
+            lon = lon[self.__cell_index]
+            lat = lat[self.__cell_index]
 
         # create output numpy array template to be filled with output
         output_tmpl = np.zeros(
-            shape=(self.__ncell, bands, time_length),  # time = 1
-            dtype=self.__output_types[index].type,
+            shape=(len(cells), bands, time_length),  # time = 1
+            dtype=self.__get_output_dtype(self.__output_types[index]),
         )
 
         # Check if data array is of type integer, use -9999 for nan
-        if self.__output_types[index].type == int:
-            output_tmpl[:] = -9999
+        if np.issubdtype(output_tmpl.dtype, np.integer):
+            output_tmpl[:] = max(-9999, np.iinfo(output_tmpl.dtype).min)
         else:
             output_tmpl[:] = np.nan
 
@@ -1108,9 +2017,9 @@ class LPJmLCoupler:
             data=output_tmpl,
             dims=("cell", "band", "time"),
             coords=dict(
-                cell=np.arange(self.__config.startgrid, self.__config.endgrid + 1),
-                lon=(["cell"], self.grid.coords["lon"].values),
-                lat=(["cell"], self.grid.coords["lat"].values),
+                cell=cells,
+                lon=(["cell"], lon),
+                lat=(["cell"], lat),
                 band=np.arange(bands),  # [str(i) for i in range(bands)],
                 time=np.arange(time_length),
             ),
@@ -1181,33 +2090,38 @@ class LPJmLCoupler:
                     )
             # execute sending values method to actually send the input to
             #   socket
-            self.__send_input_values(data[self.__input_ids[index]])
+            start = time.perf_counter()
+            nbytes = self.__send_input_values(
+                data[self.__input_ids[index]], lpjml_type=self.__input_types[index]
+            )
+            name = self.__input_ids[index]
+            self.__stats.add_time(
+                year, "send_s", time.perf_counter() - start, stream=name
+            )
+            self.__stats.add_bytes(year, name, nbytes)
 
-    def __send_input_values(self, data):
-        """Iterate over all values to be sent to the socket. Recursive iteration
-        with the correct order of bands and cells for inputs.
+    def __send_input_values(self, data, lpjml_type=LPJmlValueType(3)):
+        """Send all values of an input to the socket at once. Values are
+        serialized band by band (all cells of band 1, all cells of band 2, ...)
+        into one contiguous buffer of the wire data type.
         """
-        dims = data.shape
-        one_band = len(dims) == 1
-        cells, bands = dims[0], dims[1]
-
-        # Determine the send function based on data type
-        send_function = send_int if "int" in str(data.dtype) else send_float
-
-        # Iterate over bands (outer loop) and cells (inner loop)
-        for band in range(bands):
-            for cell in range(cells):
-                # Send the value to the socket
-                if one_band:
-                    send_function(self._channel, data[cell])
-                else:
-                    send_function(self._channel, data[cell, band])
+        cells = data.shape[0]
+
+        # Fortran order of (cell, band) equals the band-major order of the
+        #   socket - no copy if data already has this layout and data type
+        values = np.asarray(data.reshape(cells, -1), dtype=lpjml_type.dtype, order="F")
+
+        # Send the whole block of the input with a single call
+        self._channel.sendall(values.ravel(order="F"))
+
+        return values.nbytes
 
     def __read_output_data(self, validate_year, to_xarray=True):
         """Read output data checks supplied year and sets numpy array template
         for corresponding output (index). If set correct executes
         private read_output_values method to read the corresponding output.
         """
+        start = time.perf_counter()
         index = read_int(self._channel)
         year = read_int(self._channel)
         if not validate_year == year:
@@ -1217,46 +2131,193 @@ class LPJmLCoupler:
                 + f"match the received year: {year}"
             )
         if index in self.__output_ids:
-            output = self.__output_templates[index]
-            if not to_xarray:
-                # read and assign corresponding values from socket to numpy array
-                output = self.__read_output_values(
-                    output=output.values.copy(),
-                    dims=list(np.shape(output)),
-                    lpjml_type=self.__output_types[index],
-                )
-            else:
+            self.__output_order.append(index)
+            # read corresponding values from socket into output buffer
+            read_into(self._channel, self.__output_buffers[index])
+            self.__mask_output_values(index)
+            name = self.__output_ids[index]
+            self.__stats.add_time(
+                year, "receive_s", time.perf_counter() - start, stream=name
+            )
+            self.__stats.add_bytes(year, name, self.__output_buffers[index].nbytes)
+            # as list for appending/extending as list
+            return {name: self.__assign_output_values(index, year, to_xarray)}
 
-                output.coords["time"] = pd.date_range(str(year), periods=1, freq="YE")
+    def __write_outputs(self, year):
+        """Append received outputs of year to the opened writers (and
+        histories)
+        """
+        for writer in self.__writers:
+            writer.write(
+                {
+                    name: self.__get_output_values(index)
+                    for index, name in self.__output_ids.items()
+                    if name in writer.names
+                },
+                year,
+            )
+
+    def __reduce_outputs(self, year):
+        """Apply the registered reducers to the received outputs of year"""
+        if not self.__reducers:
+            return
+        indices = {name: index for index, name in self.__output_ids.items()}
+        reductions = {}
+        for reducer in self.__reducers:
+            start = time.perf_counter()
+            reductions[reducer.name] = reducer(
+                self.__get_output_values(indices[reducer.output])
+            )
+            self.__stats.add_time(
+                year, "reduce_s", time.perf_counter() - start, stream=reducer.name
+            )
+        self.__reductions = reductions
+
+    def __compile_output_plan(self):
+        """Compile wire plan of the outputs sent per year from the recorded
+        order of outputs. Output buffers become views on its arena.
+        """
+        self.__output_plan = LPJmLWirePlan(
+            order=self.__output_order,
+            ncell=self.__ncell,
+            bands={index: self.__output_bands[index] for index in self.__output_order},
+            types={index: self.__output_types[index] for index in self.__output_order},
+        )
+        self.__output_buffers = self.__output_plan.values
 
-                # read and assign corresponding values from socket to numpy array
-                output.values = self.__read_output_values(
-                    output=output.values,
-                    dims=list(np.shape(output)),
-                    lpjml_type=self.__output_types[index],
+    def __read_output_plan(self, validate_year, to_xarray=True, assign=True):
+        """Read all outputs of a year at once following the wire plan and
+        validate the received tokens, indices and years. If not assign, values
+        are only received into the output buffers.
+        """
+        if self._prefetch_future is not None:
+            # time blocked waiting for the outputs received in the background
+            start = time.perf_counter()
+            timings, (_, received) = self.__finish_prefetch()
+            waited = time.perf_counter() - start
+        else:
+            timings = {} if self.__output_timings else None
+            waited, received = self.__output_plan.receive(self._channel, timings)
+        try:
+            self.__output_plan.validate(year=validate_year)
+        except ValueError:
+            self.close()
+            raise
+
+        self.__stats.add_time(validate_year, "lpjml_s", waited)
+        if timings is None:
+            self.__stats.add_time(
+                validate_year, "receive_s", received, stream="outputs"
+            )
+        for index in self.__output_plan.order:
+            self.__mask_output_values(index)
+            name = self.__output_ids[index]
+            if timings is not None:
+                self.__stats.add_time(
+                    validate_year, "receive_s", timings[index], stream=name
                 )
-            # as list for appending/extending as list
-            return {self.__output_ids[index]: output}
+            self.__stats.add_bytes(
+                validate_year, name, self.__output_plan.values[index].nbytes
+            )
+
+        if not assign:
+            return {}
+        return {
+            self.__output_ids[index]: self.__assign_output_values(
+                index=index, year=validate_year, to_xarray=to_xarray
+            )
+            for index in self.__output_plan.order
+        }
+
+    def __start_prefetch(self):
+        """Receive the next year of outputs into the second wire plan in a
+        background thread.
+        """
+        if self.__prefetch_plan is None:
+            self.__prefetch_plan = LPJmLWirePlan(**self.__output_plan.__getstate__())
+        # queued after pending sends of inputs in the same thread
+        self.__prefetch_timings = {} if self.__output_timings else None
+        self._prefetch_future = self.__get_channel_executor().submit(
+            self.__prefetch_plan.receive, self._channel, self.__prefetch_timings
+        )
+
+    def __finish_prefetch(self):
+        """Wait for the background receive to be finished and swap the wire
+        plans (double buffering), so the prefetched year becomes the current.
+        """
+        future, self._prefetch_future = self._prefetch_future, None
+        try:
+            received = future.result()
+        except Exception:
+            self.close()
+            raise
+        self.__output_plan, self.__prefetch_plan = (
+            self.__prefetch_plan,
+            self.__output_plan,
+        )
+        self.__output_buffers = self.__output_plan.values
+        return self.__prefetch_timings, received
 
-    def __read_output_values(self, output, dims=None, lpjml_type=LPJmlValueType(3)):
-        """Iterate over all values to be read from the socket. Recursive iteration
-        with the correct order of cells and bands for outputs.
+    def __assign_output_values(self, index, year, to_xarray=True):
+        """Assign received values of output buffer to corresponding output
+        template (xarray) or a copy of it (numpy).
         """
-        cells, bands = dims[0], dims[1]
-        # Determine if there is only one band
-        one_band = cells > 0 and bands == 0
-
-        # Iterate over cells (outer loop) and bands (inner loop)
-        for band in range(bands):
-            for cell in range(cells):
-                # Read the value from the socket
-                if one_band:
-                    output[cell] = lpjml_type.read_fun(self._channel)
-                else:
-                    output[cell, band] = lpjml_type.read_fun(self._channel)
+        start = time.perf_counter()
+        output = self.__output_templates[index]
+        if self.__output_ring is not None:
+            # fill preallocated values of the ring in place
+            output = self.__read_output_values(
+                output=self.__output_ring.get_values(index), index=index
+            )
+        elif not to_xarray:
+            # assign corresponding values from buffer to numpy array
+            output = self.__read_output_values(output=output.values.copy(), index=index)
+        else:
+
+            output.coords["time"] = self.__output_times[year]
 
+            # assign corresponding values from buffer to numpy array
+            output.values = self.__read_output_values(output=output.values, index=index)
+
+        self.__stats.add_time(
+            year,
+            "decode_s",
+            time.perf_counter() - start,
+            stream=self.__output_ids[index],
+        )
         return output
 
+    def __read_output_values(self, output, index):
+        """Assign all values of an output received into its buffer. Values are
+        sent band by band (all cells of band 1, all cells of band 2, ...), which
+        is the memory layout of the Fortran ordered (cell, band) output buffer
+        they are received into in place.
+        """
+        buffer = self.__get_output_values(index)
+
+        # Assign (cell, band) buffer to output with trailing time dimension
+        output[...] = buffer.reshape(output.shape, order="F")
+
+        return output
+
+    def __mask_output_values(self, index):
+        """Compact received values of an output to the selected cells"""
+        if self.__cell_index is not None:
+            np.take(
+                self.__output_buffers[index],
+                self.__cell_index,
+                axis=0,
+                out=self.__masked_buffers[index],
+            )
+
+    def __get_output_values(self, index):
+        """Get received values of an output (compacted to the selected
+        cells) with dimensions (cell, band)
+        """
+        if self.__cell_index is not None:
+            return self.__masked_buffers[index]
+        return self.__output_buffers[index]
+
     def __read_meta_output(self, index=None, output_id=None):
         """Read meta output data from socket. Returns dictionary with
         corresponding meta output id and value.
@@ -1290,7 +2351,9 @@ class LPJmLCoupler:
         """Representation of the Coupler object"""
         if hasattr(self, "_channel"):
             try:
-                port = self._channel.getsockname()[1]
+                port = self._channel.getsockname()
+                # tcp address or path of unix domain socket
+                port = port if isinstance(port, str) else port[1]
             except OSError:
                 port = "<closed>"
         else:
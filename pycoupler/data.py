@@ -54,6 +54,8 @@ class LPJmLInputType(Enum):
 def append_to_dict(data_dict, data):
     """
     Append data along the third dimension to the data_dict.
+    Each call copies the whole history, use :class:`LPJmLAppender` to append
+    many years.
 
     :param data_dict: Dictionary holding the data.
     :type data_dict: dict
@@ -76,6 +78,95 @@ def append_to_dict(data_dict, data):
     return data_dict
 
 
+class LPJmLAppender:
+    """Append arrays of (cells, bands) or (cells, bands, time) along the
+    time dimension into buffers with spare capacity (doubled when full), so
+    appending n years costs O(n) copies instead of O(n²) with
+    :func:`append_to_dict`. The buffers are owned by the appender, which is
+    not thread-safe (use one appender per thread).
+
+    >>> appender = LPJmLAppender()
+    >>> for year in coupler.get_sim_years():
+    ...     appender.append(coupler.read_output(year, to_xarray=False))
+    >>> history = appender.to_dict()
+
+    Arrays returned by :meth:`__getitem__` are views on the buffers. Views
+    keep their values, as only time steps beyond them are written later.
+    """
+
+    def __init__(self):
+        """Constructor method"""
+        self.__buffers = {}
+        self.__lengths = {}
+
+    def append(self, data):
+        """Append data along the time dimension
+        :param data: dictionary with ids/names as keys and numpy arrays with
+            dimensions (cells, bands) or (cells, bands, time) as values
+        :type data: dict
+        :return: appender
+        :rtype: LPJmLAppender
+        """
+        for key, value in data.items():
+            value = np.atleast_3d(np.asarray(value))
+            buffer = self.__buffers.get(key)
+            length = self.__lengths.get(key, 0)
+            nsteps = value.shape[2]
+
+            if buffer is not None and buffer.shape[:2] != value.shape[:2]:
+                raise ValueError(
+                    f"Shape {value.shape[:2]} of {key} does not match the"
+                    f" appended shape {buffer.shape[:2]}."
+                )
+            dtype = value.dtype if buffer is None else buffer.dtype
+            if (
+                buffer is None
+                or buffer.shape[2] < length + nsteps
+                or np.result_type(dtype, value) != dtype
+            ):
+                # grow into a new buffer, views on the old one stay valid
+                grown = np.empty(
+                    value.shape[:2] + (2 * (length + nsteps),),
+                    dtype=np.result_type(dtype, value),
+                    order="F",
+                )
+                if buffer is not None:
+                    grown[..., :length] = buffer[..., :length]
+                buffer = self.__buffers[key] = grown
+
+            buffer[..., length : length + nsteps] = value  # noqa
+            self.__lengths[key] = length + nsteps
+        return self
+
+    def __getitem__(self, key):
+        """Get appended values of key with dimensions (cells, bands, time)"""
+        return self.__buffers[key][..., : self.__lengths[key]]  # noqa
+
+    def __contains__(self, key):
+        return key in self.__buffers
+
+    def __len__(self):
+        """Get number of appended keys"""
+        return len(self.__buffers)
+
+    def keys(self):
+        """Get appended keys"""
+        return self.__buffers.keys()
+
+    def to_dict(self, copy=False):
+        """Get appended values of all keys
+        :param copy: if True, return copies (without spare capacity) instead
+            of views on the buffers. Defaults to False
+        :type copy: bool
+        :return: dictionary of arrays with dimensions (cells, bands, time)
+        :rtype: dict
+        """
+        return {
+            key: self[key].copy(order="F") if copy else self[key]
+            for key in self.__buffers
+        }
+
+
 class LPJmLData(xr.DataArray):
     """Class for LPJmL data"""
 
@@ -316,11 +407,13 @@ class LPJmLDataSet(xr.Dataset):
         # TODO: this is a hack to get around the fact that we don't have
         #  a proper way to represent band dimensions in xarray
 
-        # get the corresponding band dimension
+        # get the corresponding band dimension (renamed on shallow copies to
+        #   keep the variables of the dataset unchanged)
         band_dim = [
             dim for dim in variable._dims if dim.startswith("band") and dim != "band"
         ]
         if band_dim:
+            variable = variable.copy(deep=False)
             variable._dims = variable._parse_dimensions(
                 [
                     dim if not dim.startswith("band") else "band"
@@ -336,8 +429,9 @@ class LPJmLDataSet(xr.Dataset):
                     del indexes[key]
                 else:
                     band_idx_name = key
-            indexes["band"] = indexes.pop(band_idx_name)
-            indexes["band"].index.name = "band"
+            indexes["band"] = indexes.pop(band_idx_name).rename(
+                {band_idx_name: "band"}, {band_idx_name: "band"}
+            )
 
         # get the corresponding "band" coords and delete all other band coords
         band_coords = [
@@ -349,7 +443,7 @@ class LPJmLDataSet(xr.Dataset):
                     del coords[key]
                 else:
                     band_coords_name = key
-            coords["band"] = coords.pop(band_coords_name)
+            coords["band"] = coords.pop(band_coords_name).copy(deep=False)
             coords["band"]._dims = ("band",)
 
         # rename the band dimension to only name "band"
@@ -0,0 +1,290 @@
+import asyncio
+import os
+
+import numpy as np
+
+from pycoupler.aio import AsyncLPJmLCoupler
+from pycoupler.transport import UnixTransport, allocate_ports, get_transport
+
+
+class EnsembleCoupler:
+    """Coupler of an ensemble of LPJmL runs driven from one Python process.
+    Each member is an :class:`pycoupler.aio.AsyncLPJmLCoupler` with its own
+    port (or socket file), all members are multiplexed on one asyncio event
+    loop. Years are advanced for all members at once and outputs can be
+    stacked along a leading member dimension, so that the coupled model can
+    compute all members vectorized with numpy.
+
+    Ports are allocated with :meth:`allocate` before the ensemble is created
+    with the :meth:`create` coroutine, LPJmL run i has to connect to
+    ``ports[i]``:
+
+    >>> ports = EnsembleCoupler.allocate(len(config_files))
+    >>> # start LPJmL run i connecting to ports[i]
+    >>> ensemble = await EnsembleCoupler.create(config_files, ports=ports)
+    >>> for year in ensemble.get_sim_years():
+    ...     await ensemble.send_input(inputs, year, stacked=True)
+    ...     outputs = await ensemble.read_output(year)
+
+    :param members: couplers of the ensemble members
+    :type members: list
+    """
+
+    def __init__(self, members):
+        """Constructor method"""
+        self.__members = list(members)
+
+        sim_years = [member.sim_years for member in self.__members]
+        if any(years != sim_years[0] for years in sim_years[1:]):
+            self.close()
+            raise ValueError("Simulation years of the ensemble members differ.")
+
+    @staticmethod
+    def allocate(n, transport="tcp", port=2224, host=""):
+        """Allocate the ports of n ensemble members, to be passed to the LPJmL
+        runs (to connect to) and to :meth:`create`.
+        :param n: number of ensemble members
+        :type n: int
+        :param transport: transport LPJmL connects to ("tcp" or "unix").
+            Defaults to "tcp"
+        :type transport: str
+        :param port: first port to allocate the ports from. Defaults to 2224
+        :type port: int
+        :param host: host address the ports are checked for. Defaults to ""
+        :type host: str
+        :return: free ports (tcp) or ports of unused default socket files
+            (unix), see :class:`pycoupler.transport.UnixTransport`
+        :rtype: list
+        """
+        if transport != "unix":
+            return allocate_ports(n, port=port, host=host)
+
+        ports = []
+        while len(ports) < n:
+            if not os.path.lexists(UnixTransport(port=port).path):
+                ports.append(port)
+            port += 1
+        return ports
+
+    @classmethod
+    async def create(
+        cls,
+        config_files,
+        version=3,
+        host="",
+        ports=None,
+        transport="tcp",
+        **kwargs,
+    ):
+        """Wait for all LPJmL runs to connect and perform their handshakes
+        concurrently. The runs have to know their ports before, so `ports`
+        (see :meth:`allocate`) or a list of transports are required.
+        :param config_files: file names (including relative/absolute path) of
+            the LPJmL configurations of the members
+        :type config_files: list
+        :param version: version of the coupler, to be validated with LPJmL
+            internal coupler
+        :type version: int
+        :param host: host address of the server LPJmL is running. Defaults to
+            "" (all IPs of localhost)
+        :type host: str
+        :param ports: ports of the members (for "tcp" and the default socket
+            files of "unix"), required if `transport` is a name
+        :type ports: list
+        :param transport: transport LPJmL connects to ("tcp" or "unix") or a
+            list of transport objects (one per member). Defaults to "tcp"
+        :type transport: str or list
+        :param kwargs: further options of the member couplers, see
+            :class:`pycoupler.aio.AsyncLPJmLCoupler`
+        :return: initialized ensemble coupler
+        :rtype: EnsembleCoupler
+        """
+        if isinstance(transport, (list, tuple)):
+            transports = list(transport)
+        else:
+            if ports is None:
+                raise ValueError(
+                    "Ports of the members are required, allocate them with"
+                    " EnsembleCoupler.allocate before starting the LPJmL runs."
+                )
+            transports = [
+                get_transport(transport, host=host, port=member_port)
+                for member_port in ports
+            ]
+        if len(transports) != len(config_files):
+            raise ValueError(
+                f"Number of transports ({len(transports)}) does not match the"
+                f" number of config files ({len(config_files)})."
+            )
+
+        results = await asyncio.gather(
+            *[
+                AsyncLPJmLCoupler.create(
+                    config_file,
+                    version=version,
+                    host=host,
+                    transport=transport,
+                    **kwargs,
+                )
+                for config_file, transport in zip(config_files, transports)
+            ],
+            return_exceptions=True,
+        )
+        errors = [result for result in results if isinstance(result, BaseException)]
+        if errors:
+            for result in results:
+                if not isinstance(result, BaseException):
+                    result.close()
+            raise errors[0]
+
+        return cls(results)
+
+    @property
+    def members(self):
+        """Get the couplers of the ensemble members
+        :getter: Couplers of the members
+        :type: list
+        """
+        return self.__members
+
+    @property
+    def ports(self):
+        """Get the ports (or socket files) LPJmL runs are connected to
+        :getter: Ports of the members
+        :type: list
+        """
+        return [
+            (
+                getattr(member.transport, "port", None)
+                if member.transport.name == "tcp"
+                else getattr(member.transport, "path", None)
+            )
+            for member in self.__members
+        ]
+
+    @property
+    def sim_years(self):
+        """Get a list of all simulation years (shared by all members)
+        :getter: List of all simulation years
+        :type: list
+        """
+        return self.__members[0].sim_years
+
+    def get_sim_years(self):
+        """Get a generator for all simulation years (shared by all members)
+        :return: Generator for all simulation years
+        :rtype: generator
+        """
+        return self.__members[0].get_sim_years()
+
+    async def read_historic_output(self, to_xarray=True):
+        """Read historic output of all members
+        :return: list of historic outputs per member, see
+            :meth:`LPJmLCoupler.read_historic_output`
+        :rtype: list
+        """
+        return await asyncio.gather(
+            *[member.read_historic_output(to_xarray) for member in self.__members]
+        )
+
+    async def send_input(self, inputs, year, stacked=False):
+        """Send input data of iterated year to all members. Inputs are either
+        a list of input dictionaries (one per member) or one input dictionary.
+        With `stacked`, the arrays of the dictionary hold the inputs of all
+        members along a leading member dimension (member, ncell, nband), else
+        the same inputs are sent to all members.
+        :param inputs: inputs of the members
+        :type inputs: list or dict
+        :param year: supply year for validation
+        :type year: int
+        :param stacked: if True, arrays of the input dictionary are stacked
+            along a leading member dimension. Defaults to False
+        :type stacked: bool
+        """
+        if isinstance(inputs, dict):
+            if stacked:
+                invalid = [
+                    name
+                    for name, values in inputs.items()
+                    if np.ndim(values) < 2 or np.shape(values)[0] != len(self)
+                ]
+                if invalid:
+                    self.close()
+                    raise ValueError(
+                        f"Stacked inputs {invalid} do not have a leading member"
+                        f" dimension of size {len(self)}."
+                    )
+                inputs = [
+                    {name: values[member] for name, values in inputs.items()}
+                    for member in range(len(self))
+                ]
+            else:
+                inputs = [inputs] * len(self)
+        elif len(inputs) != len(self):
+            self.close()
+            raise ValueError(
+                f"Number of inputs ({len(inputs)}) does not match the number"
+                f" of ensemble members ({len(self)})."
+            )
+
+        await asyncio.gather(
+            *[
+                member.send_input(input_dict, year)
+                for member, input_dict in zip(self.__members, inputs)
+            ]
+        )
+
+    async def read_output(self, year, stack=True, to_xarray=False):
+        """Read LPJmL output data of the specified year of all members.
+        :param year: year for which output data is to be read
+        :type year: int
+        :param stack: if True, return numpy arrays stacked along a leading
+            member dimension (member, ncell, nband, time). Else return a list
+            of outputs per member. Defaults to True
+        :type stack: bool
+        :param to_xarray: if True (and not stacked), outputs of the members
+            are returned as LPJmLDataSet. Defaults to False
+        :type to_xarray: bool
+        :return: dictionary of stacked outputs or list of outputs per member
+        :rtype: dict or list
+        """
+        outputs = await asyncio.gather(
+            *[
+                member.read_output(year, to_xarray=to_xarray and not stack)
+                for member in self.__members
+            ]
+        )
+        if not stack:
+            return outputs
+
+        return {
+            name: np.stack([output[name] for output in outputs]) for name in outputs[0]
+        }
+
+    def close(self):
+        """Close socket channels of all members"""
+        for member in self.__members:
+            member.close()
+
+    def __len__(self):
+        """Get number of ensemble members"""
+        return len(self.__members)
+
+    def __getitem__(self, member):
+        """Get coupler of ensemble member"""
+        return self.__members[member]
+
+    def __iter__(self):
+        """Iterate over couplers of the ensemble members"""
+        return iter(self.__members)
+
+    def __repr__(self):
+        """Representation of the EnsembleCoupler object"""
+        return "\n".join(
+            [
+                f"<pycoupler.{self.__class__.__name__}>",
+                f"  * members    {len(self)}",
+                f"  * ports      {self.ports}",
+                f"  * sim_years  {self.sim_years[0]}-{self.sim_years[-1]}",
+            ]
+        )
@@ -0,0 +1,292 @@
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from pycoupler.data import LPJmLData, LPJmLDataSet
+
+# dimensions of the history layouts
+HISTORY_DIMS = ("time", "band", "cell")
+
+
+def create_view(template, data, dims, years):
+    """Create LPJmLData view on history data of an output
+    :param template: output template (LPJmLData) with coordinates and
+        attributes of the output
+    :type template: LPJmLData
+    :param data: history data (not copied)
+    :type data: numpy.ndarray
+    :param dims: dimensions of data, a permutation of ("time", "band", "cell")
+    :type dims: tuple
+    :param years: years of the time dimension
+    :type years: list
+    :return: history of the output
+    :rtype: LPJmLData
+    """
+    band_dim = [dim for dim in template.dims if dim.startswith("band")][0]
+    coords = {
+        "cell": template.coords["cell"].values,
+        band_dim: template.coords[band_dim].values,
+        "time": pd.to_datetime([f"{year}-12-31" for year in years]),
+    }
+    for coord in ["lon", "lat"]:
+        if coord in template.coords:
+            coords[coord] = (("cell",), template.coords[coord].values)
+
+    history = LPJmLData(
+        data=data,
+        dims=[band_dim if dim == "band" else dim for dim in dims],
+        coords=coords,
+        name=template.name,
+    )
+    history.attrs.update(template.attrs)
+    return history
+
+
+class LPJmLMemmapHistory:
+    """History of LPJmL outputs over many years kept in memory-mapped files
+    (one per output) on local scratch instead of in RAM. Outputs are exposed
+    as LPJmLData views on the memory maps, so slicing a few years or cells
+    only pages in what is touched. Usually opened via
+    :meth:`pycoupler.coupler.LPJmLCoupler.open_history`.
+
+    :param templates: output templates (LPJmLData with dimensions cell, band,
+        time) per output name, defining bands, data types and coordinates
+    :type templates: dict
+    :param nyear: number of years the files are allocated for
+    :type nyear: int
+    :param path: directory the memory-mapped files are written to. Defaults
+        to None (new temporary directory, removed on :meth:`close`)
+    :type path: str
+    :param layout: order of the dimensions in the files, a permutation of
+        ("time", "band", "cell"). Defaults to ("time", "band", "cell"), with
+        all cells of a band contiguous
+    :type layout: tuple
+    """
+
+    def __init__(self, templates, nyear, path=None, layout=HISTORY_DIMS):
+        """Constructor method"""
+        layout = tuple(layout)
+        if sorted(layout) != sorted(HISTORY_DIMS):
+            raise ValueError(
+                f"Invalid layout {layout}, must be a permutation of {HISTORY_DIMS}."
+            )
+        # temporary directories are owned (and removed) by the history
+        self.__owns_path = path is None
+        if path is None:
+            path = tempfile.mkdtemp(prefix="pycoupler_history_")
+        os.makedirs(path, exist_ok=True)
+
+        self.path = path
+        self.layout = layout
+        self.nyear = nyear
+        self.names = list(templates)
+        self.years = []
+
+        self.__templates = templates
+        self.__memmaps = {}
+        for name, template in templates.items():
+            band_dim = [dim for dim in template.dims if dim.startswith("band")][0]
+            sizes = dict(
+                time=nyear, band=template.sizes[band_dim], cell=template.sizes["cell"]
+            )
+            self.__memmaps[name] = np.memmap(
+                self.get_file_name(name),
+                dtype=template.dtype,
+                mode="w+",
+                shape=tuple(sizes[dim] for dim in layout),
+            )
+
+        # order of the (cell, band) dimensions of outputs in the layout
+        self.__axes = [("cell", "band").index(dim) for dim in layout if dim != "time"]
+
+    def get_file_name(self, name):
+        """Get file name of the memory-mapped file of an output
+        :param name: output name
+        :type name: str
+        :return: file name
+        :rtype: str
+        """
+        return os.path.join(self.path, f"{name}.{'_'.join(self.layout)}.bin")
+
+    def write(self, outputs, year):
+        """Append outputs of a year to the history
+        :param outputs: outputs as dictionary of numpy arrays with dimensions
+            (cell, band) or (cell, band, 1)
+        :type outputs: dict
+        :param year: year of the outputs
+        :type year: int
+        """
+        step = len(self.years)
+        if step >= self.nyear:
+            raise IndexError(f"History is full, allocated for {self.nyear} years.")
+
+        for name, memmap in self.__memmaps.items():
+            values = np.asarray(outputs[name])
+            values = values.reshape(values.shape[0], -1)
+            memmap[self.__get_index(step)] = values.transpose(self.__axes)
+        self.years.append(year)
+
+    def flush(self):
+        """Flush written years to the files"""
+        for memmap in self.__memmaps.values():
+            memmap.flush()
+
+    def close(self):
+        """Flush written years to the files. A temporary directory created by
+        the history is removed, views stay accessible as long as they are
+        referenced (on POSIX systems).
+        """
+        self.flush()
+        if self.__owns_path:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self.__owns_path = False
+
+    def __get_index(self, time):
+        return tuple(time if dim == "time" else slice(None) for dim in self.layout)
+
+    def __getitem__(self, name):
+        """Get history of an output as LPJmLData view on its memory map
+        :param name: output name
+        :type name: str
+        :return: history with dimensions of the layout
+        :rtype: LPJmLData
+        """
+        return create_view(
+            self.__templates[name],
+            self.__memmaps[name][self.__get_index(slice(0, len(self.years)))],
+            self.layout,
+            self.years,
+        )
+
+    def __len__(self):
+        """Get number of years written"""
+        return len(self.years)
+
+    def to_dataset(self, names=None):
+        """Get history of outputs as LPJmLDataSet of views on the memory maps
+        :param names: output names. Defaults to None (all outputs)
+        :type names: list
+        :return: history of outputs
+        :rtype: LPJmLDataSet
+        """
+        return LPJmLDataSet({name: self[name] for name in names or self.names})
+
+    def __repr__(self):
+        """Representation of the history object"""
+        return "\n".join(
+            [
+                f"<pycoupler.{self.__class__.__name__}>",
+                f"  * path       {self.path}",
+                f"  * layout     {self.layout}",
+                f"  * outputs    {self.names}",
+                f"  * years      {len(self)} of {self.nyear}",
+            ]
+        )
+
+
+class LPJmLRingHistory:
+    """History of the last `nyear` years of LPJmL outputs in fixed-size
+    circular (cell, band, time) buffers, e.g. for moving averages over recent
+    years. Each year is written twice into a buffer of 2 * nyear years, so
+    the last years are always one contiguous, time-ordered slice, exposed as
+    views without copying. Memory stays constant over the whole run.
+    Usually created with the `recent_years` option of
+    :class:`pycoupler.coupler.LPJmLCoupler`.
+
+    :param templates: output templates (LPJmLData with dimensions cell, band,
+        time) per output name, defining bands, data types and coordinates
+    :type templates: dict
+    :param nyear: number of recent years kept
+    :type nyear: int
+    """
+
+    def __init__(self, templates, nyear):
+        """Constructor method"""
+        if nyear < 1:
+            raise ValueError(f"Number of years must be >= 1, got {nyear}")
+        self.nyear = nyear
+        self.names = list(templates)
+        self.count = 0
+
+        self.__templates = templates
+        self.__years = np.zeros(2 * nyear, dtype=int)
+        self.__buffers = {
+            name: np.empty(
+                template.shape[:2] + (2 * nyear,), dtype=template.dtype, order="F"
+            )
+            for name, template in templates.items()
+        }
+
+    @property
+    def years(self):
+        """Get the years kept (oldest first)
+        :getter: Years kept
+        :type: list
+        """
+        return self.__years[self.__get_window()].tolist()
+
+    def write(self, outputs, year):
+        """Write outputs of a year, replacing the oldest year if full
+        :param outputs: outputs as dictionary of numpy arrays with dimensions
+            (cell, band) or (cell, band, 1)
+        :type outputs: dict
+        :param year: year of the outputs
+        :type year: int
+        """
+        slot = self.count % self.nyear
+        for name, buffer in self.__buffers.items():
+            values = np.asarray(outputs[name]).reshape(buffer.shape[:2], order="A")
+            buffer[..., slot] = values
+            buffer[..., slot + self.nyear] = values
+        self.__years[[slot, slot + self.nyear]] = year
+        self.count += 1
+
+    def close(self):
+        """Nothing to close, buffers stay accessible"""
+
+    def __get_window(self):
+        # last written years are the nyear (or less) positions ending at the
+        #   second copy of the last slot
+        end = (self.count - 1) % self.nyear + self.nyear + 1 if self.count else 0
+        return slice(end - len(self), end)
+
+    def __getitem__(self, name):
+        """Get recent years of an output as time-ordered LPJmLData view
+        :param name: output name
+        :type name: str
+        :return: recent years with dimensions (cell, band, time)
+        :rtype: LPJmLData
+        """
+        window = self.__get_window()
+        return create_view(
+            self.__templates[name],
+            self.__buffers[name][..., window],
+            ("cell", "band", "time"),
+            self.__years[window],
+        )
+
+    def __len__(self):
+        """Get number of years kept"""
+        return min(self.count, self.nyear)
+
+    def to_dataset(self, names=None):
+        """Get recent years of outputs as LPJmLDataSet of views
+        :param names: output names. Defaults to None (all outputs)
+        :type names: list
+        :return: recent years of outputs
+        :rtype: LPJmLDataSet
+        """
+        return LPJmLDataSet({name: self[name] for name in names or self.names})
+
+    def __repr__(self):
+        """Representation of the history object"""
+        return "\n".join(
+            [
+                f"<pycoupler.{self.__class__.__name__}>",
+                f"  * outputs    {self.names}",
+                f"  * years      {self.years}",
+            ]
+        )
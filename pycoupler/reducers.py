@@ -0,0 +1,115 @@
+import numpy as np
+
+# available reductions
+REDUCTIONS = ["sum", "mean"]
+
+
+class LPJmLReducer:
+    """Reduction of a socket output applied to the values as received from
+    LPJmL (cell, band), band block by band block, without materializing the
+    output. Register reducers with
+    :meth:`pycoupler.coupler.LPJmLCoupler.add_reducer`.
+
+    >>> coupler.add_reducer("pft_harvestc", "sum", dim="cell", by="country")
+    >>> reductions = coupler.read_output(year, reduce_only=True)
+
+    :param output: name of the output to be reduced
+    :type output: str
+    :param how: reduction, "sum" or "mean". Defaults to "sum"
+    :type how: str
+    :param dim: dimension to be reduced, "band" (result per cell) or "cell"
+        (result per band or per group and band). Defaults to "band"
+    :type dim: str
+    :param groups: group codes per cell (e.g. country codes) to reduce cells
+        group-wise (dim="cell" only). Defaults to None
+    :type groups: numpy.ndarray
+    :param weights: weights per cell (e.g. terr_area), values are multiplied
+        by the weights, means are weighted means. Defaults to None
+    :type weights: numpy.ndarray
+    :param name: name of the reduction. Defaults to None
+        ("{output}_{how}_{dim or groups}")
+    :type name: str
+    """
+
+    def __init__(
+        self, output, how="sum", dim="band", groups=None, weights=None, name=None
+    ):
+        """Constructor method"""
+        if how not in REDUCTIONS:
+            raise ValueError(
+                f"Reduction {how} not supported, choose from {REDUCTIONS}."
+            )
+        if dim not in ["band", "cell"]:
+            raise ValueError(f"Dimension {dim} not supported, choose band or cell.")
+        if groups is not None and dim != "cell":
+            raise ValueError("Groups are only supported for reductions over cells.")
+
+        self.output = output
+        self.how = how
+        self.dim = dim
+        self.name = name or f"{output}_{how}_{dim if groups is None else 'groups'}"
+        self.weights = (
+            None if weights is None else np.asarray(weights, dtype=float).ravel()
+        )
+
+        if groups is not None:
+            # group codes and index of the group of each cell
+            self.groups, self.group_index = np.unique(
+                np.asarray(groups).ravel(), return_inverse=True
+            )
+            self.__norm = np.bincount(
+                self.group_index, weights=self.weights, minlength=len(self.groups)
+            )
+        else:
+            self.groups = None
+            self.group_index = None
+
+    def __call__(self, values):
+        """Reduce values of an output
+        :param values: values with dimensions (cell, band)
+        :type values: numpy.ndarray
+        :return: reduced values with dimensions (cell,), (band,) or
+            (group, band)
+        :rtype: numpy.ndarray
+        """
+        ncell, nband = values.shape[:2]
+        if self.dim == "band":
+            reduced = np.zeros(ncell)
+            for band in range(nband):
+                reduced += values[:, band]
+            if self.how == "mean":
+                reduced /= nband
+            if self.weights is not None:
+                reduced *= self.weights
+            return reduced
+
+        if self.groups is not None:
+            reduced = np.empty((len(self.groups), nband))
+            for band in range(nband):
+                block = values[:, band]
+                if self.weights is not None:
+                    block = block * self.weights
+                reduced[:, band] = np.bincount(
+                    self.group_index, weights=block, minlength=len(self.groups)
+                )
+            if self.how == "mean":
+                reduced /= self.__norm[:, np.newaxis]
+            return reduced
+
+        reduced = np.empty(nband)
+        for band in range(nband):
+            block = values[:, band]
+            if self.weights is not None:
+                reduced[band] = np.dot(self.weights, block)
+            else:
+                reduced[band] = block.sum(dtype=float)
+        if self.how == "mean":
+            reduced /= ncell if self.weights is None else self.weights.sum()
+        return reduced
+
+    def __repr__(self):
+        """Representation of the reducer object"""
+        return (
+            f"<pycoupler.{self.__class__.__name__}> {self.name}"
+            f" ({self.how} of {self.output} over {self.dim})"
+        )
@@ -0,0 +1,145 @@
+import time
+
+import pandas as pd
+
+
+class LPJmLCouplerStats:
+    """Per-year timings and byte counters of the coupling with LPJmL, to tell
+    whether a coupled run is bound by LPJmL, by the data transfer or by the
+    coupled model (caller). For every coupled year the following is recorded:
+
+    * lpjml_s: time blocked waiting for the first token of LPJmL per
+      operation (LPJmL compute time)
+    * receive_s: time receiving each output (dict of output names, or
+      "outputs" for all outputs of a year received at once)
+    * decode_s: time decoding (assigning) each output (dict of output names)
+    * reduce_s: time applying each reducer (dict of reduction names)
+    * send_s: time serializing and sending each input (dict of input names)
+    * bytes: bytes of data moved per stream (dict of input/output names)
+    * caller_s: time spent in the caller between calls of the coupler
+      (coupled model compute time)
+
+    >>> coupler.stats[2023]["lpjml_s"]
+    >>> coupler.stats.summary()
+    """
+
+    def __init__(self):
+        """Constructor method"""
+        self.years = {}
+        self._last_call = None
+
+    def __getitem__(self, year):
+        """Get record of year"""
+        return self.years[year]
+
+    def __len__(self):
+        """Get number of recorded years"""
+        return len(self.years)
+
+    def get_year(self, year):
+        """Get record of year, created if not existing
+        :param year: year of record
+        :type year: int
+        :return: record of year
+        :rtype: dict
+        """
+        record = self.years.get(year)
+        if record is None:
+            record = self.years[year] = {
+                "lpjml_s": 0.0,
+                "caller_s": 0.0,
+                "receive_s": {},
+                "decode_s": {},
+                "reduce_s": {},
+                "send_s": {},
+                "bytes": {},
+            }
+        return record
+
+    def add_time(self, year, key, seconds, stream=None):
+        """Add seconds to timing key (of stream) of year
+        :param year: year of record
+        :type year: int
+        :param key: "lpjml_s", "caller_s", "receive_s", "decode_s",
+            "reduce_s" or "send_s"
+        :type key: str
+        :param seconds: seconds to add
+        :type seconds: float
+        :param stream: name of input or output for per-stream timings
+        :type stream: str
+        """
+        record = self.get_year(year)
+        if stream is None:
+            record[key] += seconds
+        else:
+            record[key][stream] = record[key].get(stream, 0.0) + seconds
+
+    def add_bytes(self, year, stream, nbytes):
+        """Add number of bytes moved for stream (input or output) of year"""
+        streams = self.get_year(year)["bytes"]
+        streams[stream] = streams.get(stream, 0) + nbytes
+
+    def begin_call(self, year):
+        """Mark the caller calling the coupler, time since the last call
+        returned is added to caller_s of year
+        """
+        if self._last_call is not None:
+            self.add_time(year, "caller_s", time.perf_counter() - self._last_call)
+            self._last_call = None
+
+    def end_call(self):
+        """Mark a call of the coupler returning to the caller"""
+        self._last_call = time.perf_counter()
+
+    def to_dataframe(self):
+        """Get totals of all recorded years as DataFrame (one row per year)
+        :return: timings in seconds and bytes per year
+        :rtype: pandas.DataFrame
+        """
+        rows = {
+            year: {
+                key: sum(value.values()) if isinstance(value, dict) else value
+                for key, value in record.items()
+            }
+            for year, record in self.years.items()
+        }
+        return pd.DataFrame.from_dict(rows, orient="index").rename_axis("year")
+
+    def summary(self):
+        """Get totals over all recorded years and the phase the coupled run is
+        bound by ("lpjml", "transfer" or "caller")
+        :return: total seconds per phase, total bytes and bound
+        :rtype: dict
+        """
+        totals = self.to_dataframe().sum().to_dict()
+        totals["bytes"] = int(totals.get("bytes", 0))
+        phases = {
+            "lpjml": totals.get("lpjml_s", 0.0),
+            "transfer": sum(
+                totals.get(key, 0.0)
+                for key in ["receive_s", "decode_s", "reduce_s", "send_s"]
+            ),
+            "caller": totals.get("caller_s", 0.0),
+        }
+        totals["bound"] = max(phases, key=phases.get) if self.years else None
+        return totals
+
+    def __repr__(self):
+        """Representation of the stats object"""
+        summary = self.summary()
+        if summary["bound"] is None:
+            return f"<pycoupler.{self.__class__.__name__}> (no years recorded)"
+        return "\n".join(
+            [
+                f"<pycoupler.{self.__class__.__name__}>",
+                f"  * years      {len(self)}",
+                f"  * lpjml      {summary['lpjml_s']:.3f} s",
+                f"  * receive    {summary['receive_s']:.3f} s",
+                f"  * decode     {summary['decode_s']:.3f} s",
+                f"  * reduce     {summary['reduce_s']:.3f} s",
+                f"  * send       {summary['send_s']:.3f} s",
+                f"  * caller     {summary['caller_s']:.3f} s",
+                f"  * bytes      {summary['bytes']}",
+                f"  * bound      {summary['bound']}",
+            ]
+        )
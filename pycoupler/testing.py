@@ -0,0 +1,329 @@
+import os
+import socket
+import struct
+import threading
+import time
+
+import numpy as np
+
+from pycoupler.coupler import LPJmlValueType, LPJmLToken, recvall, recvall_into
+from pycoupler.data import LPJmLInputType, read_meta
+from pycoupler.transport import (
+    LoopbackTransport,
+    TCPTransport,
+    UnixTransport,
+    get_transport,
+)
+
+# LPJmL value types of the datatypes used in the meta files of LPJmL outputs
+META_TYPES = {
+    "byte": LPJmlValueType.LPJML_BYTE,
+    "short": LPJmlValueType.LPJML_SHORT,
+    "int": LPJmlValueType.LPJML_INT,
+    "float": LPJmlValueType.LPJML_FLOAT,
+    "double": LPJmlValueType.LPJML_DOUBLE,
+}
+
+STATIC_OUTPUTS = ["grid", "country", "region", "terr_area", "lake_area"]
+
+
+class FakeLPJmL:
+    """Pure-Python stand-in for LPJmL that speaks the coupler protocol
+    (version 3) over a real socket, for tests and benchmarks of the
+    LPJmLCoupler without LPJmL. It runs as client in a background thread:
+
+    >>> lpjml = FakeLPJmL.from_config(config, port=2224)
+    >>> lpjml.start()
+    >>> coupler = LPJmLCoupler(config_file, port=2224)
+    >>> ...
+    >>> lpjml.join()
+
+    Outputs are deterministic (see :meth:`data`), received inputs are stored
+    in :attr:`received` with (year, index) as keys.
+
+    :param ncell: number of cells
+    :type ncell: int
+    :param inputs: socket inputs as dict of index: (number of bands,
+        LPJmlValueType)
+    :type inputs: dict
+    :param outputs: socket outputs as dict of index: (number of bands,
+        LPJmlValueType), static outputs included
+    :type outputs: dict
+    :param static: static outputs (sent once after the handshake) as dict of
+        index: output id (e.g. "grid")
+    :type static: dict
+    :param outputyear: first year outputs are sent
+    :type outputyear: int
+    :param start_coupling: first year inputs are requested
+    :type start_coupling: int
+    :param lastyear: last simulation year
+    :type lastyear: int
+    :param startgrid: index of the first cell (used for the grid). Defaults
+        to 0
+    :type startgrid: int
+    :param order: order of the outputs sent each year (indices). Defaults to
+        the order of `outputs`
+    :type order: list
+    :param delay: simulated computation time per year in seconds. Defaults
+        to 0
+    :type delay: float
+    :param host: host of the coupler to connect to. Defaults to "localhost"
+    :type host: str
+    :param port: port of the coupler to connect to. Defaults to 2224
+    :type port: int
+    :param transport: transport of the coupler ("tcp", "unix" or transport
+        object, for "loopback" the `peer` end is used). Defaults to "tcp"
+    :type transport: str or LPJmLTransport
+    :param record_inputs: if True, received inputs are stored in
+        :attr:`received`. Defaults to True
+    :type record_inputs: bool
+    :param constant_data: if True, the data of each output is generated once
+        (for the first output year) and sent every year, e.g. to keep the data
+        generation out of benchmarks. Defaults to False
+    :type constant_data: bool
+    :param version: version of the coupler protocol. Defaults to 3
+    :type version: int
+    """
+
+    def __init__(
+        self,
+        ncell,
+        inputs,
+        outputs,
+        static,
+        outputyear,
+        start_coupling,
+        lastyear,
+        startgrid=0,
+        order=None,
+        delay=0,
+        host="localhost",
+        port=2224,
+        transport="tcp",
+        record_inputs=True,
+        constant_data=False,
+        version=3,
+    ):
+        """Constructor method"""
+        self.ncell = ncell
+        self.inputs = inputs
+        self.outputs = outputs
+        self.static = static
+        self.outputyear = outputyear
+        self.start_coupling = start_coupling
+        self.lastyear = lastyear
+        self.startgrid = startgrid
+        if order is None:
+            order = [index for index in outputs if index not in static]
+        self.order = order
+        self.delay = delay
+        self.transport = get_transport(transport, host=host, port=port)
+        self.record_inputs = record_inputs
+        self.constant_data = constant_data
+        self.version = version
+
+        self.received = {}
+        self.error = None
+        self._channel = None
+        self.__thread = None
+        self.__outputs = {}
+
+    @classmethod
+    def from_config(cls, config, **kwargs):
+        """Create FakeLPJmL matching the socket inputs and outputs of an LPJmL
+        configuration. Number of bands and types of the outputs are read from
+        the meta files of the outputs (if available, else 1 band of
+        LPJML_FLOAT).
+        :param config: LPJmL configuration (coupled)
+        :type config: LpjmlConfig
+        :param kwargs: further arguments of FakeLPJmL (e.g. port, delay)
+        :return: FakeLPJmL
+        :rtype: FakeLPJmL
+        """
+        inputs = {}
+        for key in config.get_input_sockets():
+            input_type = LPJmLInputType[key]
+            inputs[input_type.value] = (
+                input_type.nband,
+                (
+                    LPJmlValueType.LPJML_INT
+                    if input_type.type is int
+                    else LPJmlValueType.LPJML_FLOAT
+                ),
+            )
+
+        outputs = {}
+        static = {}
+        for key, output in config.get_output_sockets().items():
+            meta_file = f"{output['file']['name']}.json"
+            if os.path.isfile(meta_file):
+                meta = read_meta(meta_file)
+                outputs[output["index"]] = (meta.nbands, META_TYPES[meta.datatype])
+            else:
+                outputs[output["index"]] = (1, LPJmlValueType.LPJML_FLOAT)
+            if key in STATIC_OUTPUTS:
+                static[output["index"]] = key
+
+        return cls(
+            ncell=config.endgrid - config.startgrid + 1,
+            inputs=inputs,
+            outputs=outputs,
+            static=static,
+            outputyear=config.outputyear,
+            start_coupling=config.start_coupling,
+            lastyear=config.lastyear,
+            startgrid=config.startgrid,
+            **kwargs,
+        )
+
+    def get_sim_years(self):
+        """Get simulated years
+        :return: list of simulated years
+        :rtype: list
+        """
+        return list(range(min(self.outputyear, self.start_coupling), self.lastyear + 1))
+
+    def data(self, index, year):
+        """Deterministic output data of an output index and year as sent via
+        the socket (band-major)
+        :param index: index of the output
+        :type index: int
+        :param year: year of the output
+        :type year: int
+        :return: data with dimensions (nband, ncell)
+        :rtype: numpy.ndarray
+        """
+        if self.constant_data:
+            year = self.outputyear
+        nband, lpjml_type = self.outputs[index]
+        data = np.arange(self.ncell * nband, dtype=np.int64)
+        data += index + year
+        data %= 97
+        return data.astype(lpjml_type.dtype).reshape(nband, self.ncell)
+
+    def static_data(self, index):
+        """Data of a static output as sent via the socket (cell-major)
+        :param index: index of the static output
+        :type index: int
+        :return: data with dimensions (ncell, nband)
+        :rtype: numpy.ndarray
+        """
+        nband, lpjml_type = self.outputs[index]
+        cells = np.arange(self.startgrid, self.startgrid + self.ncell)
+        if self.static[index] == "grid":
+            # 0.5 degree global grid
+            data = np.column_stack(
+                [-179.75 + 0.5 * (cells % 720), -89.75 + 0.5 * (cells // 720)]
+            )
+        else:
+            data = np.repeat((cells % 97)[:, np.newaxis], nband, axis=1)
+        return data.astype(lpjml_type.dtype)
+
+    def start(self):
+        """Connect to the coupler and run the simulation in a background
+        thread
+        """
+        self.__thread = threading.Thread(
+            target=self.__run, name="FakeLPJmL", daemon=True
+        )
+        self.__thread.start()
+
+    def join(self, timeout=None):
+        """Wait for the simulation to end, raise errors of the simulation"""
+        self.__thread.join(timeout)
+        if self.error is not None:
+            raise self.error
+
+    def run(self):
+        """Connect to the coupler and run the simulation (blocking)"""
+        self._channel = self.__connect()
+        try:
+            self.__handshake()
+            for year in self.get_sim_years():
+                self.__simulate_year(year)
+        finally:
+            self._channel.close()
+
+    def __run(self):
+        try:
+            self.run()
+        except Exception as error:
+            self.error = error
+
+    def __connect(self, timeout=30):
+        if isinstance(self.transport, LoopbackTransport):
+            return self.transport.peer
+        elif isinstance(self.transport, UnixTransport):
+            family, address = socket.AF_UNIX, self.transport.path
+        elif isinstance(self.transport, TCPTransport):
+            family = socket.AF_INET
+            address = (self.transport.host or "localhost", self.transport.port)
+        else:
+            raise TypeError(f"Transport {self.transport} not supported.")
+
+        # wait for the coupler to listen
+        start = time.monotonic()
+        while True:
+            channel = socket.socket(family, socket.SOCK_STREAM)
+            try:
+                channel.connect(address)
+                return channel
+            except OSError:
+                channel.close()
+                if time.monotonic() - start > timeout:
+                    raise
+                time.sleep(0.01)
+
+    def __send_int(self, *values):
+        self._channel.sendall(struct.pack(f"{len(values)}i", *values))
+
+    def __read_int(self):
+        return struct.unpack("i", recvall(self._channel, 4))[0]
+
+    def __handshake(self):
+        if recvall(self._channel, 1) != b"1":
+            raise ValueError("Invalid greeting received from coupler.")
+        # known integer and number of tasks
+        self.__send_int(1, 1)
+        self.__read_int()
+
+        self.__send_int(self.version, self.ncell, len(self.inputs), len(self.outputs))
+        for index, (nband, lpjml_type) in self.inputs.items():
+            self.__send_int(LPJmLToken.SEND_INPUT_SIZE.value, index, lpjml_type.value)
+            if self.__read_int() != nband:
+                raise ValueError(f"Invalid number of bands for input {index}.")
+
+        for index, (nband, lpjml_type) in self.outputs.items():
+            self.__send_int(
+                LPJmLToken.READ_OUTPUT_SIZE.value, index, 1, nband, lpjml_type.value
+            )
+            self.__read_int()
+
+        self.__send_int(LPJmLToken.GET_STATUS.value)
+        self.__read_int()
+
+        for index in self.static:
+            self.__send_int(LPJmLToken.READ_OUTPUT.value, index)
+            self._channel.sendall(self.static_data(index))
+
+    def __simulate_year(self, year):
+        # outputs are computed before inputs are requested (only once for
+        #   constant data)
+        if year >= self.outputyear and not (self.constant_data and self.__outputs):
+            self.__outputs = {index: self.data(index, year) for index in self.order}
+
+        if year >= self.start_coupling:
+            for index, (nband, lpjml_type) in self.inputs.items():
+                self.__send_int(LPJmLToken.SEND_INPUT.value, index, year)
+                values = np.empty((nband, self.ncell), dtype=lpjml_type.dtype)
+                recvall_into(self._channel, values)
+                if self.record_inputs:
+                    self.received[(year, index)] = values.T
+
+        if self.delay:
+            time.sleep(self.delay)
+
+        if year >= self.outputyear:
+            for index in self.order:
+                self.__send_int(LPJmLToken.READ_OUTPUT.value, index, year)
+                self._channel.sendall(self.__outputs[index])
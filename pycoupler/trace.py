@@ -0,0 +1,235 @@
+import os
+import struct
+import threading
+import time
+
+from pycoupler.transport import LPJmLTransport
+
+# file signature and version of the trace format
+TRACE_MAGIC = b"LPJTRACE"
+TRACE_VERSION = 1
+
+# direction of recorded bytes
+RECEIVED = 0
+SENT = 1
+
+# record header: direction (uint8), seconds since start of the recording
+#   (float64) and number of bytes (uint32), followed by the bytes
+RECORD_HEADER = struct.Struct("<BdI")
+
+
+class TraceWriter:
+    """Writer of binary protocol traces. A trace file starts with the
+    signature LPJTRACE and the format version (uint32) followed by records of
+    the bytes received from and sent to LPJmL with their timestamps.
+
+    :param file_name: file name (including relative/absolute path) of the
+        trace file
+    :type file_name: str
+    """
+
+    def __init__(self, file_name):
+        """Constructor method"""
+        self.file_name = file_name
+        self._file = open(file_name, "wb")
+        self._file.write(TRACE_MAGIC + struct.pack("<I", TRACE_VERSION))
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def write(self, direction, data, timestamp=None):
+        """Append record of bytes to the trace
+        :param direction: RECEIVED (0) or SENT (1)
+        :type direction: int
+        :param data: bytes received or sent
+        :type data: bytes-like
+        :param timestamp: seconds since start of the recording. Defaults to
+            the time elapsed since the writer was created
+        :type timestamp: float
+        """
+        if timestamp is None:
+            timestamp = time.perf_counter() - self._start
+        data = memoryview(data).cast("B")
+        with self._lock:
+            self._file.write(RECORD_HEADER.pack(direction, timestamp, len(data)))
+            self._file.write(data)
+
+    def close(self):
+        """Close the trace file"""
+        self._file.close()
+
+
+def read_trace(file_name):
+    """Read records of a binary protocol trace
+    :param file_name: file name (including relative/absolute path) of the
+        trace file
+    :type file_name: str
+    :return: list of records (direction, timestamp, bytes)
+    :rtype: list
+    """
+    with open(file_name, "rb") as trace_file:
+        trace = trace_file.read()
+
+    header_size = len(TRACE_MAGIC) + 4
+    if trace[: len(TRACE_MAGIC)] != TRACE_MAGIC:
+        raise ValueError(f"File {file_name} is not a pycoupler trace.")
+    version = struct.unpack_from("<I", trace, len(TRACE_MAGIC))[0]
+    if version != TRACE_VERSION:
+        raise ValueError(f"Invalid trace version {version}, must be {TRACE_VERSION}")
+
+    records = []
+    offset = header_size
+    with memoryview(trace) as view:
+        while offset < len(trace):
+            direction, timestamp, nbytes = RECORD_HEADER.unpack_from(view, offset)
+            offset += RECORD_HEADER.size
+            end = offset + nbytes
+            records.append((direction, timestamp, bytes(view[offset:end])))
+            offset = end
+
+    return records
+
+
+class TraceRecorder:
+    """Channel wrapper recording the raw bytes received from and sent to LPJmL
+    into a binary trace file (see :class:`TraceWriter`). All other attributes
+    are taken from the wrapped channel.
+
+    :param channel: channel (socket) to LPJmL
+    :type channel: socket.socket
+    :param file_name: file name (including relative/absolute path) of the
+        trace file
+    :type file_name: str
+    """
+
+    def __init__(self, channel, file_name):
+        """Constructor method"""
+        self._channel = channel
+        self._writer = TraceWriter(file_name)
+
+    def recv_into(self, buffer, nbytes=0):
+        """Receive bytes into buffer and record them"""
+        received = self._channel.recv_into(buffer, nbytes)
+        with memoryview(buffer) as view:
+            self._writer.write(RECEIVED, view.cast("B")[:received])
+        return received
+
+    def sendall(self, data):
+        """Send all bytes of data and record them"""
+        self._channel.sendall(data)
+        self._writer.write(SENT, data)
+
+    def send(self, data):
+        """Send bytes of data and record the ones sent"""
+        sent = self._channel.send(data)
+        self._writer.write(SENT, memoryview(data).cast("B")[:sent])
+        return sent
+
+    def close(self):
+        """Close the channel and the trace file"""
+        self._channel.close()
+        self._writer.close()
+
+    def __getattr__(self, name):
+        return getattr(self._channel, name)
+
+
+class ReplayChannel:
+    """Channel replaying the bytes received in a recorded trace at full speed.
+    Sent bytes are discarded or, if validated, compared with the recorded
+    ones.
+
+    :param file_name: file name (including relative/absolute path) of the
+        trace file
+    :type file_name: str
+    :param validate: if True, raise a ValueError if sent bytes differ from the
+        recorded ones. Defaults to False
+    :type validate: bool
+    """
+
+    def __init__(self, file_name, validate=False):
+        """Constructor method"""
+        self.file_name = file_name
+        records = read_trace(file_name)
+        self._received = memoryview(
+            b"".join(data for direction, _, data in records if direction == RECEIVED)
+        )
+        self._sent = memoryview(
+            b"".join(data for direction, _, data in records if direction == SENT)
+        )
+        self._validate = validate
+        self._closed = False
+        self.nbytes_received = 0
+        self.nbytes_sent = 0
+
+    def recv_into(self, buffer, nbytes=0):
+        """Copy the next recorded bytes into buffer (socket.recv_into
+        interface). Returns 0 at the end of the trace.
+        """
+        self.__check_closed()
+        view = memoryview(buffer).cast("B")
+        nbytes = min(nbytes or len(view), len(self._received) - self.nbytes_received)
+        start = self.nbytes_received
+        view[:nbytes] = self._received[start : start + nbytes]  # noqa
+        self.nbytes_received += nbytes
+        return nbytes
+
+    def sendall(self, data):
+        """Discard (or validate) sent bytes (socket.sendall interface)"""
+        self.__check_closed()
+        data = memoryview(data).cast("B")
+        if self._validate:
+            start = self.nbytes_sent
+            if self._sent[start : start + len(data)] != data:  # noqa
+                raise ValueError(
+                    f"Sent bytes {self.nbytes_sent} to"
+                    f" {self.nbytes_sent + len(data)} differ from the trace"
+                    f" {self.file_name}."
+                )
+        self.nbytes_sent += len(data)
+
+    def send(self, data):
+        """Discard (or validate) sent bytes (socket.send interface)"""
+        self.sendall(data)
+        return len(data)
+
+    def close(self):
+        """Close the channel"""
+        self._closed = True
+
+    def getsockname(self):
+        """Get name of the trace file (socket.getsockname interface)"""
+        self.__check_closed()
+        return os.path.basename(self.file_name)
+
+    def __check_closed(self):
+        if self._closed:
+            raise OSError("Replay channel is closed.")
+
+
+class ReplayTransport(LPJmLTransport):
+    """Transport replaying a recorded protocol trace instead of connecting to
+    LPJmL, e.g. to reproduce coupling sessions offline or to profile the
+    coupler in isolation.
+
+    :param file_name: file name (including relative/absolute path) of the
+        trace file
+    :type file_name: str
+    :param validate: if True, raise a ValueError if sent bytes differ from the
+        recorded ones. Defaults to False
+    :type validate: bool
+    """
+
+    name = "replay"
+
+    def __init__(self, file_name, validate=False):
+        """Constructor method"""
+        self.file_name = file_name
+        self.validate = validate
+
+    def accept(self):
+        """Return channel replaying the trace"""
+        return ReplayChannel(self.file_name, validate=self.validate)
+
+    def __repr__(self):
+        """Representation of the transport object"""
+        return f"<pycoupler.{self.__class__.__name__}> {self.file_name}"
@@ -0,0 +1,220 @@
+import os
+import socket
+import stat
+import tempfile
+
+
+class LPJmLTransport:
+    """Base class of the transports LPJmL connects to. A transport opens the
+    server side of the connection and returns the channel (socket) all
+    reading and sending functions of the coupler operate on.
+    """
+
+    name = None
+
+    def accept(self):
+        """Wait for LPJmL to connect and return the connected channel
+        :return: connected channel
+        :rtype: socket.socket
+        """
+        raise NotImplementedError
+
+    def __repr__(self):
+        """Representation of the transport object"""
+        return f"<pycoupler.{self.__class__.__name__}>"
+
+
+class TCPTransport(LPJmLTransport):
+    """TCP server socket bound to host and port (LPJmL default).
+
+    :param host: host address of the server LPJmL is running. Defaults to ""
+        (all IPs of localhost)
+    :type host: str
+    :param port: port of the server address. Defaults to 2224
+    :type port: int
+    """
+
+    name = "tcp"
+
+    def __init__(self, host="", port=2224):
+        """Constructor method"""
+        self.host = host
+        self.port = port
+
+    def accept(self):
+        """Wait for LPJmL to connect to host:port and return the connected
+        socket
+        """
+        # create an INET, STREAMing socket
+        serversocket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        serversocket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            # bind the socket to a public host, and a well-known port
+            serversocket.bind((self.host, self.port))
+            # become a server socket
+            serversocket.listen(5)
+            # accept connections from outside
+            channel, address = serversocket.accept()
+        finally:
+            serversocket.close()
+
+        # send small messages (tokens, band sizes) without delay
+        channel.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        return channel
+
+    def __repr__(self):
+        """Representation of the transport object"""
+        return f"<pycoupler.{self.__class__.__name__}> {self.host}:{self.port}"
+
+
+class UnixTransport(LPJmLTransport):
+    """Unix domain (AF_UNIX) stream socket bound to a file path, for LPJmL
+    and the coupled model running on the same node.
+
+    :param path: file path of the socket. Defaults to pycoupler_<port>.sock in
+        the temporary directory of the system
+    :type path: str
+    :param port: port number used for the default path. Defaults to 2224
+    :type port: int
+    """
+
+    name = "unix"
+
+    def __init__(self, path=None, port=2224):
+        """Constructor method"""
+        if path is None:
+            path = os.path.join(tempfile.gettempdir(), f"pycoupler_{port}.sock")
+        self.path = path
+
+    def prepare(self):
+        """Remove a stale socket file left from a previous run at the socket
+        path before binding. Other files and sockets another coupler is
+        listening on are not removed.
+        """
+        if not os.path.lexists(self.path):
+            return
+        if not stat.S_ISSOCK(os.lstat(self.path).st_mode):
+            raise FileExistsError(
+                f"Socket path {self.path} exists and is not a socket."
+            )
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+            try:
+                probe.connect(self.path)
+            except ConnectionRefusedError:
+                # nobody is listening, socket is stale
+                os.remove(self.path)
+                return
+        raise FileExistsError(f"Socket path {self.path} is in use by another server.")
+
+    def cleanup(self):
+        """Remove the socket file bound by the transport"""
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def accept(self):
+        """Wait for LPJmL to connect to the socket path and return the
+        connected socket
+        """
+        self.prepare()
+
+        serversocket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            serversocket.bind(self.path)
+        except OSError:
+            serversocket.close()
+            raise
+        try:
+            serversocket.listen(1)
+            channel, address = serversocket.accept()
+        finally:
+            serversocket.close()
+            self.cleanup()
+
+        return channel
+
+    def __repr__(self):
+        """Representation of the transport object"""
+        return f"<pycoupler.{self.__class__.__name__}> {self.path}"
+
+
+class LoopbackTransport(LPJmLTransport):
+    """In-process connected socket pair, e.g. for an LPJmL emulator running in
+    a thread of the same process (testing, benchmarks). The LPJmL side of the
+    connection is available as :attr:`peer`.
+    """
+
+    name = "loopback"
+
+    def __init__(self):
+        """Constructor method"""
+        self._channel, self.peer = socket.socketpair()
+
+    def accept(self):
+        """Return the coupler side of the socket pair"""
+        return self._channel
+
+    def __getstate__(self):
+        # Exclude the sockets, copies of the transport are not connected
+        state = self.__dict__.copy()
+        state["_channel"] = None
+        state["peer"] = None
+        return state
+
+
+def get_transport(transport="tcp", host="", port=2224, path=None):
+    """Get transport object by name.
+    :param transport: name of the transport ("tcp", "unix" or "loopback") or
+        transport object (returned as is). Defaults to "tcp"
+    :type transport: str or LPJmLTransport
+    :param host: host address for "tcp". Defaults to ""
+    :type host: str
+    :param port: port for "tcp" (and default path of "unix"). Defaults to 2224
+    :type port: int
+    :param path: file path of the socket for "unix"
+    :type path: str
+    :return: transport object
+    :rtype: LPJmLTransport
+    """
+    if isinstance(transport, LPJmLTransport):
+        return transport
+    elif transport == "tcp":
+        return TCPTransport(host=host, port=port)
+    elif transport == "unix":
+        return UnixTransport(path=path, port=port)
+    elif transport == "loopback":
+        return LoopbackTransport()
+    else:
+        raise ValueError(
+            f"Transport {transport} not supported. Choose from 'tcp', 'unix' or"
+            " 'loopback'."
+        )
+
+
+def allocate_ports(n, port=2224, host=""):
+    """Find free TCP ports (not bound by another process), e.g. to couple an
+    ensemble of LPJmL runs. Ports are searched upwards from `port`.
+    :param n: number of ports
+    :type n: int
+    :param port: first port to check. Defaults to 2224
+    :type port: int
+    :param host: host address the ports are checked for. Defaults to ""
+    :type host: str
+    :return: list of free ports
+    :rtype: list
+    """
+    ports = []
+    while len(ports) < n:
+        if port > 65535:
+            raise ValueError(f"Only {len(ports)} of {n} free ports found.")
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as probe:
+            probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            try:
+                probe.bind((host, port))
+            except OSError:
+                pass
+            else:
+                ports.append(port)
+        port += 1
+    return ports
@@ -0,0 +1,180 @@
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import netCDF4
+import numpy as np
+
+# time units of the written files (decoded by xarray as datetime64)
+TIME_UNITS = "days since 1901-01-01 00:00:00"
+TIME_CALENDAR = "standard"
+
+# target size of the default chunks (one year of a block of cells)
+CHUNK_BYTES = 2**21
+
+
+class LPJmLOutputWriter:
+    """Streaming writer of LPJmL outputs to a NetCDF4 file with unlimited time
+    dimension. Each year of outputs is appended as it is received, so memory
+    stays flat for arbitrarily long coupled runs. Writing is done in a
+    background thread, errors are raised on the next call of :meth:`write`
+    or :meth:`close`. Usually opened via
+    :meth:`pycoupler.coupler.LPJmLCoupler.open_writer`.
+
+    Variables are written with dimensions (time, cell, band). By default they
+    are chunked by single years and blocks of cells of about 2 MB (all
+    bands). Each yearly append then writes complete chunks only, so that no
+    chunk is read back and rewritten and the chunk cache does not matter,
+    while reading time series of some cells touches one small chunk per year.
+    Chunks of several years (e.g. 10 years of all cells, ~80 MB for 67420
+    cells and 32 float bands) do not fit the default chunk cache and are
+    rewritten on every append.
+
+    :param file_name: file name (including relative/absolute path) of the
+        NetCDF4 file to be written
+    :type file_name: str
+    :param templates: output templates (LPJmLData with dimensions cell, band,
+        time) per output name, defining bands, data types and attributes
+    :type templates: dict
+    :param chunks: chunk sizes of the time and cell dimension (bands are not
+        chunked). Defaults to None (1 year and cells of about 2 MB per output)
+    :type chunks: tuple
+    :param background: if True, write in a background thread. Defaults to True
+    :type background: bool
+    :param max_pending: maximum number of years queued for writing, further
+        calls of write wait. Defaults to 2
+    :type max_pending: int
+    """
+
+    def __init__(
+        self, file_name, templates, chunks=None, background=True, max_pending=2
+    ):
+        """Constructor method"""
+        self.file_name = file_name
+        self.names = list(templates)
+        self.max_pending = max_pending
+        self.__executor = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="pycoupler-writer")
+            if background
+            else None
+        )
+        self.__pending = deque()
+        self.__nyear = 0
+
+        first = templates[self.names[0]]
+        ncell = first.sizes["cell"]
+
+        self.__dataset = netCDF4.Dataset(file_name, "w", format="NETCDF4")
+        self.__dataset.createDimension("time", None)
+        self.__dataset.createDimension("cell", ncell)
+
+        time = self.__dataset.createVariable("time", "f8", ("time",))
+        time.units = TIME_UNITS
+        time.calendar = TIME_CALENDAR
+        cell = self.__dataset.createVariable("cell", "i4", ("cell",))
+        cell[:] = first.coords["cell"].values
+        coords = [coord for coord in ["lon", "lat"] if coord in first.coords]
+        for coord in coords:
+            variable = self.__dataset.createVariable(coord, "f4", ("cell",))
+            variable[:] = first.coords[coord].values
+
+        self.__variables = {}
+        for name, template in templates.items():
+            band_dim = [dim for dim in template.dims if dim.startswith("band")][0]
+            band_name = f"band ({name})"
+            self.__dataset.createDimension(band_name, template.sizes[band_dim])
+            band = self.__dataset.createVariable(band_name, str, (band_name,))
+            band[:] = np.asarray(template.coords[band_dim].values, dtype=str).astype(
+                object
+            )
+
+            nband = template.sizes[band_dim]
+            if chunks is None:
+                cell_chunk = CHUNK_BYTES // (nband * template.dtype.itemsize)
+                variable_chunks = (1, max(1, min(ncell, cell_chunk)), nband)
+            else:
+                variable_chunks = (chunks[0], min(ncell, chunks[1]), nband)
+            variable = self.__dataset.createVariable(
+                name,
+                template.dtype,
+                ("time", "cell", band_name),
+                chunksizes=variable_chunks,
+            )
+            if coords:
+                variable.coordinates = " ".join(coords)
+            for key, value in template.attrs.items():
+                if isinstance(value, (str, int, float, np.number)):
+                    variable.setncattr(key, value)
+            self.__variables[name] = variable
+
+    @property
+    def nyear(self):
+        """Get the number of years written (or queued for writing)
+        :getter: Number of years
+        :type: int
+        """
+        return self.__nyear
+
+    def write(self, outputs, year):
+        """Append outputs of a year to the file
+        :param outputs: outputs as dictionary of numpy arrays with dimensions
+            (cell, band) or (cell, band, 1) or LPJmLDataSet
+        :type outputs: dict or LPJmLDataSet
+        :param year: year of the outputs
+        :type year: int
+        """
+        # copy outputs as the buffers are reused for the next year
+        values = {
+            name: np.array(np.asarray(outputs[name]).reshape(-1, variable.shape[2]))
+            for name, variable in self.__variables.items()
+        }
+        step = self.__nyear
+        self.__nyear += 1
+
+        if self.__executor is None:
+            self.__write(values, year, step)
+            return
+
+        while len(self.__pending) >= self.max_pending:
+            self.__pending.popleft().result()
+        self.__pending.append(self.__executor.submit(self.__write, values, year, step))
+
+    def flush(self):
+        """Wait for queued years to be written and flush them to disk"""
+        while self.__pending:
+            self.__pending.popleft().result()
+        self.__dataset.sync()
+
+    def close(self):
+        """Write queued years and close the file"""
+        try:
+            self.flush()
+        finally:
+            if self.__executor is not None:
+                self.__executor.shutdown(wait=True)
+            if self.__dataset.isopen():
+                self.__dataset.close()
+
+    def __write(self, values, year, step):
+        self.__dataset["time"][step] = netCDF4.date2num(
+            datetime(year, 12, 31), TIME_UNITS, TIME_CALENDAR
+        )
+        for name, variable in self.__variables.items():
+            variable[step, :, :] = values[name]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self):
+        """Representation of the writer object"""
+        return "\n".join(
+            [
+                f"<pycoupler.{self.__class__.__name__}>",
+                f"  * file_name  {self.file_name}",
+                f"  * outputs    {self.names}",
+                f"  * years      {self.__nyear}",
+            ]
+        )
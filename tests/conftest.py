@@ -1,6 +1,13 @@
 import os
+import sys
+import numpy as np
 import pytest
 
+from pycoupler.config import read_config
+from pycoupler.coupler import LPJmLCoupler
+from pycoupler.testing import FakeLPJmL
+from pycoupler.transport import get_transport
+
 
 def get_test_path():
     """Fixture for the test path."""
@@ -13,6 +20,94 @@ def test_path():
     return get_test_path()
 
 
+@pytest.fixture
+def lpjml_trace():
+    """Fixture for the recorded LPJmL protocol trace of the coupled test."""
+    return f"{get_test_path()}/data/test_receive.trace"
+
+
+@pytest.fixture
+def coupled_config(test_path, tmp_path, monkeypatch):
+    """Fixture for the coupled test configuration written to tmp_path, as
+    (config, config file). The coupler is not in test mode, so that it uses
+    the configuration as is (e.g. with FakeLPJmL).
+    """
+    monkeypatch.delattr(sys, "_called_from_test")
+    config = read_config(f"{test_path}/data/config_coupled_test.json")
+    config.set_outputpath(f"{test_path}/data/output/coupled_test")
+    config_file = f"{tmp_path}/config_coupled_test.json"
+    config.to_json(config_file)
+    return config, config_file
+
+
+class FakeCoupling:
+    """Coupler connected to a running FakeLPJmL"""
+
+    inputs = {"with_tillage": np.array([[1], [0]])}
+
+    def __init__(self, config, lpjml, coupler, options):
+        self.config = config
+        self.lpjml = lpjml
+        self.coupler = coupler
+        self.options = options
+        self.historic = None
+
+    def run(self, inputs=None, callback=None, **kwargs):
+        """Read the historic output and couple all simulation years.
+        :param inputs: inputs sent each year or function of the year returning
+            them. Defaults to None (:attr:`inputs`)
+        :param callback: function called with year and outputs of each year
+        :param kwargs: arguments of read_output
+        :return: outputs of the last year
+        """
+        self.historic = self.coupler.read_historic_output()
+        outputs = None
+        for year in self.coupler.get_sim_years():
+            year_inputs = inputs(year) if callable(inputs) else inputs
+            self.coupler.send_input(
+                self.inputs if year_inputs is None else year_inputs, year
+            )
+            outputs = self.coupler.read_output(year, **kwargs)
+            if callback is not None:
+                callback(year, outputs)
+        return outputs
+
+    def close(self):
+        """Close the coupler and wait for FakeLPJmL to finish"""
+        self.coupler.close()
+        self.lpjml.join()
+
+
+@pytest.fixture
+def fake_coupling(request, coupled_config, tmp_path):
+    """Fixture for a coupler connected to a running FakeLPJmL of the coupled
+    test configuration. Options of the coupler are supplied by indirect
+    parametrization, with the transport name under "transport" and options of
+    FakeLPJmL under "lpjml":
+
+    >>> @pytest.mark.parametrize("fake_coupling", [{"upcast": True}], indirect=True)
+    """
+    options = dict(getattr(request, "param", {}))
+    coupler_options = dict(options)
+    lpjml_options = coupler_options.pop("lpjml", {})
+    transport = get_transport(
+        coupler_options.pop("transport", "loopback"), path=f"{tmp_path}/lpjml.sock"
+    )
+    config, config_file = coupled_config
+    lpjml = FakeLPJmL.from_config(
+        config, transport=transport, order=[44, 25, 231, 37], **lpjml_options
+    )
+    lpjml.start()
+    coupling = FakeCoupling(
+        config,
+        lpjml,
+        LPJmLCoupler(config_file=config_file, transport=transport, **coupler_options),
+        options,
+    )
+    yield coupling
+    coupling.close()
+
+
 def pytest_configure(config):
     import sys
 
@@ -0,0 +1,104 @@
+"""Test the LPJmLAggregator class."""
+
+import numpy as np
+import pytest
+
+from pycoupler.aggregation import LPJmLAggregator
+from pycoupler.data import LPJmLData, LPJmLDataSet
+
+
+def test_aggregator():
+    groups = np.array([3, 1, 3, 2, 1])
+    weights = np.array([1.0, 2.0, 3.0, 4.0, 2.0])
+    values = np.arange(5 * 2 * 3, dtype=np.float32).reshape(5, 2, 3)
+    output = LPJmLData(
+        data=values,
+        dims=("cell", "band", "time"),
+        coords=dict(cell=np.arange(5), band=["a", "b"], time=np.arange(3)),
+        name="output",
+    )
+    output.attrs["units"] = "gC/m2"
+    aggregator = LPJmLAggregator(groups, weights=weights, name="country")
+
+    total = aggregator.aggregate(output, how="sum")
+    assert total.dims == ("country", "band", "time")
+    assert list(total.country.values) == [1, 2, 3]
+    assert list(total.band.values) == ["a", "b"]
+    assert total.attrs["units"] == "gC/m2"
+    assert np.allclose(total.sel(country=3), values[0] + values[2])
+
+    mean = aggregator.aggregate(output.transpose("time", "cell", "band"), "mean")
+    assert mean.dims == ("country", "time", "band")
+    assert np.allclose(
+        mean.sel(country=1).transpose("band", "time"), (values[1] + values[4]) / 2
+    )
+
+    weighted = aggregator.aggregate(LPJmLDataSet({"output": output}), "area_weighted")
+    assert np.allclose(
+        weighted.output.sel(country=3), (values[0] * 1 + values[2] * 3) / 4
+    )
+    assert np.allclose(
+        aggregator.aggregate(values[..., 0], "sum"), total.values[..., 0]
+    )
+
+    with pytest.raises(ValueError):
+        aggregator.aggregate(output, how="max")
+    with pytest.raises(ValueError):
+        LPJmLAggregator(groups).aggregate(output, how="area_weighted")
+
+
+def test_lpjml_coupler_aggregate(fake_coupling):
+    config, lpjml = fake_coupling.config, fake_coupling.lpjml
+    lpjml_coupler = fake_coupling.coupler
+
+    def scatter_tillage(year):
+        # tillage decided per country (codes 56 and 57)
+        tillage = lpjml_coupler.scatter({56: year % 2, 57: 1}, input="with_tillage")
+        assert tillage is lpjml_coupler.get_input_buffer("with_tillage")
+        return {"with_tillage": tillage}
+
+    outputs = fake_coupling.run(inputs=scatter_tillage)
+    fake_coupling.close()
+
+    assert np.array_equal(
+        lpjml.received[(config.lastyear, 7)], [[config.lastyear % 2], [1]]
+    )
+
+    # built once per coupler
+    aggregator = lpjml_coupler.get_aggregator("region")
+    assert lpjml_coupler.get_aggregator("region") is aggregator
+
+    by_country = lpjml_coupler.aggregate(outputs, by="country", how="sum")
+    assert by_country.pft_harvestc.dims == ("country", "band", "time")
+    # fake country codes are cell % 97
+    assert list(by_country.country.values) == [56, 57]
+    assert np.allclose(
+        by_country.pft_harvestc.values[..., 0], lpjml.data(25, config.lastyear).T
+    )
+    with pytest.raises(ValueError):
+        lpjml_coupler.aggregate(outputs, how="area_weighted")
+
+
+def test_aggregator_scatter():
+    aggregator = LPJmLAggregator(np.array([3, 1, 3, 2]))
+    assert np.array_equal(
+        aggregator.scatter(np.array([10, 20, 30])), np.array([30, 10, 30, 20])
+    )
+    assert np.array_equal(
+        aggregator.scatter({1: 1.0, 2: 2.0, 3: 3.0}, weights=[1, 2, 3, 4]),
+        np.array([3.0, 2.0, 9.0, 8.0]),
+    )
+    # written into (and broadcast to the bands of) a reusable buffer
+    buffer = np.zeros((4, 2), dtype=np.int32, order="F")
+    out = aggregator.scatter(np.array([0, 1, 1]), out=buffer)
+    assert out is buffer
+    assert np.array_equal(buffer, [[1, 1], [0, 0], [1, 1], [1, 1]])
+    with pytest.raises(ValueError):
+        aggregator.scatter(np.array([1, 2]))
+    # floats are not truncated silently into integer buffers
+    with pytest.raises(ValueError, match="round them first"):
+        aggregator.scatter(np.array([0.5, 1.0, 1.0]), out=buffer)
+    aggregator.scatter(np.rint([0.4, 1.0, 1.0]).astype(np.int32), out=buffer)
+    assert np.array_equal(buffer[:, 0], [1, 0, 1, 1])
+    with pytest.raises(ValueError, match=r"groups \[2\] are missing"):
+        aggregator.scatter({1: 1.0, 3: 3.0})
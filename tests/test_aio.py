@@ -0,0 +1,115 @@
+"""Test the AsyncLPJmLCoupler class."""
+
+import asyncio
+import os
+import socket
+import numpy as np
+import pytest
+
+from pycoupler.aio import AsyncLPJmLCoupler
+from pycoupler.testing import FakeLPJmL
+from pycoupler.transport import get_transport
+
+
+def run_async_coupler(config_file, transport, **kwargs):
+    """Run a coupled simulation with the asyncio coupler"""
+
+    async def run():
+        coupler = await AsyncLPJmLCoupler.create(
+            config_file, transport=transport, **kwargs
+        )
+        try:
+            historic_outputs = await coupler.read_historic_output()
+            outputs = {}
+            for year in coupler.get_sim_years():
+                await coupler.send_input({"with_tillage": np.array([[1], [0]])}, year)
+                outputs[year] = await coupler.read_output(year, to_xarray=False)
+        finally:
+            coupler.close()
+        return coupler, historic_outputs, outputs
+
+    return asyncio.run(run())
+
+
+def test_async_lpjml_coupler(coupled_config):
+    config, config_coupled_fn = coupled_config
+
+    transport = get_transport("loopback")
+    lpjml = FakeLPJmL.from_config(config, transport=transport, order=[44, 25, 231, 37])
+    lpjml.start()
+    coupler, historic_outputs, outputs = run_async_coupler(
+        config_coupled_fn, transport, upcast=True, recent_years=2
+    )
+    lpjml.join()
+
+    # historic output
+    assert historic_outputs.time.dt.year.values.tolist() == [config.outputyear]
+    assert np.array_equal(
+        historic_outputs.pft_harvestc.values[..., 0],
+        lpjml.data(25, config.outputyear).T,
+    )
+    # read_output of all coupled years
+    assert list(outputs) == list(range(config.start_coupling, config.lastyear + 1))
+    for year, output in outputs.items():
+        assert np.array_equal(output["hdate"][..., 0], lpjml.data(44, year).T)
+    # options passed through to the coupler
+    assert outputs[config.lastyear]["hdate"].dtype == np.int64
+    assert coupler.recent_outputs.time.dt.year.values.tolist() == [
+        config.lastyear - 1,
+        config.lastyear,
+    ]
+    # send_input
+    for year in outputs:
+        assert np.array_equal(lpjml.received[(year, 7)], [[1], [0]])
+
+
+def test_async_lpjml_coupler_unix(coupled_config, tmp_path):
+    config, config_coupled_fn = coupled_config
+
+    path = f"{tmp_path}/lpjml.sock"
+    # stale socket file of a previous run
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+        stale.bind(path)
+    transport = get_transport("unix", path=path)
+    lpjml = FakeLPJmL.from_config(config, transport=transport, order=[44, 25, 231, 37])
+    lpjml.start()
+    _, _, outputs = run_async_coupler(config_coupled_fn, transport)
+    lpjml.join()
+
+    assert list(outputs) == list(range(config.start_coupling, config.lastyear + 1))
+    # socket file is removed after LPJmL has connected
+    assert not os.path.exists(path)
+
+
+@pytest.mark.parametrize("output_timings", [False, True])
+def test_async_lpjml_coupler_stats(coupled_config, output_timings):
+    config, config_coupled_fn = coupled_config
+
+    transport = get_transport("loopback")
+    # LPJmL emulator computing slower than the (idle) caller
+    lpjml = FakeLPJmL.from_config(
+        config, transport=transport, order=[44, 25, 231, 37], delay=0.01
+    )
+    lpjml.start()
+    coupler, _, outputs = run_async_coupler(
+        config_coupled_fn, transport, output_timings=output_timings
+    )
+    lpjml.join()
+
+    record = coupler.stats[config.lastyear]
+    # waiting for LPJmL is told apart from receiving the year
+    assert record["lpjml_s"] >= 0.01
+    if output_timings:
+        assert set(record["receive_s"]) == set(outputs[config.lastyear])
+    else:
+        assert set(record["receive_s"]) == {"outputs"}
+    assert record["receive_s"].get("outputs", 0.0) < record["lpjml_s"]
+
+
+def test_async_lpjml_coupler_unsupported(test_path):
+    with pytest.raises(ValueError, match="not supported"):
+        asyncio.run(
+            AsyncLPJmLCoupler.create(
+                f"{test_path}/data/config_coupled_test.json", prefetch=True
+            )
+        )
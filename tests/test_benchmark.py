@@ -0,0 +1,46 @@
+"""Test the coupling protocol benchmarks."""
+
+import sys
+import json
+
+from pycoupler.benchmark import get_cases, run_case
+from pycoupler.cli import main
+
+
+def test_get_cases():
+    sweeps = dict(ncell=[10, 100], nband=[1, 2])
+    base_case = dict(ncell=10, nband=1, noutput=1, lpjml_type="float")
+    assert len(get_cases(sweeps, base_case)) == 3
+    assert len(get_cases(sweeps, base_case, grid=True)) == 4
+
+
+def test_run_case(monkeypatch):
+    monkeypatch.delattr(sys, "_called_from_test")
+    result = run_case(
+        ncell=10, nband=2, noutput=2, lpjml_type="double", inputs=["landuse"], nyear=3
+    )
+    assert result["read_output"]["bytes_per_year"] == 10 * 2 * 2 * 8
+    assert result["send_input"]["bytes_per_year"] == 10 * 64 * 4
+    assert result["read_output"]["mb_per_s"] > 0
+
+
+def test_cli_benchmark(monkeypatch, tmp_path):
+    monkeypatch.delattr(sys, "_called_from_test")
+    main(
+        [
+            "benchmark",
+            "--ncell",
+            "10",
+            "20",
+            "--years",
+            "2",
+            "--transport",
+            "unix",
+            "--output",
+            f"{tmp_path}/benchmark.json",
+        ]
+    )
+    with open(f"{tmp_path}/benchmark.json") as file:
+        results = json.load(file)
+    assert [result["ncell"] for result in results["results"]] == [10, 20]
+    assert results["results"][0]["transport"] == "unix"
@@ -1,20 +1,37 @@
 """Test the LPJmLCoupler class."""
 
 import os
+import socket
+import netCDF4
 import numpy as np
+import xarray as xr
+import pytest
 from unittest.mock import patch
 from copy import deepcopy
-from pycoupler.coupler import LPJmLCoupler
+from pycoupler.coupler import (
+    LPJmLCoupler,
+    LPJmLOutputs,
+    LPJmLWirePlan,
+    LPJmlValueType,
+    read_into,
+    read_int,
+)
+from pycoupler.testing import FakeLPJmL
+from pycoupler.trace import ReplayTransport
+from pycoupler.transport import get_transport
 
 
 from .conftest import get_test_path
 
 
-@patch.dict(os.environ, {"TEST_PATH": get_test_path(), "TEST_LINE_COUNTER": "0"})
-def test_lpjml_coupler(test_path):
+@patch.dict(os.environ, {"TEST_PATH": get_test_path()})
+def test_lpjml_coupler(test_path, lpjml_trace):
 
     config_coupled_fn = f"{test_path}/data/config_coupled_test.json"
-    lpjml_coupler = LPJmLCoupler(config_file=config_coupled_fn)
+    lpjml_coupler = LPJmLCoupler(
+        config_file=config_coupled_fn,
+        transport=ReplayTransport(lpjml_trace, validate=True),
+    )
 
     """Test the LPJmLCoupler class."""
     inputs = lpjml_coupler.read_input(copy=False)
@@ -64,16 +81,440 @@ def test_lpjml_coupler(test_path):
 
     assert (
         repr(lpjml_coupler)
-        == f"<pycoupler.LPJmLCoupler>\nSimulation:  (version: 3, localhost:<none>)\n  * sim_year   2050\n  * ncell      2\n  * ninput     1\nConfiguration:\n  Settings:      lpjml v5.8\n    (general)\n    * sim_name   coupled_test\n    * firstyear  2001\n    * lastyear   2050\n    * startgrid  27410\n    * endgrid    27411\n    * landuse    yes\n    (changed)\n    * model_path           LPJmL_internal\n    * sim_path             {test_path}/data/\n    * outputyear           2022\n    * output_metafile      True\n    * write_restart        False\n    * nspinup              0\n    * float_grid           True\n    * restart_filename     restart/restart_historic_run.lpj\n    * outputyear           2022\n    * radiation            cloudiness\n    * fix_co2              True\n    * fix_co2_year         2018\n    * fix_climate          True\n    * fix_climate_cycle    11\n    * fix_climate_year     2013\n    * river_routing        False\n    * tillage_type         read\n    * residue_treatment    fixed_residue_remove\n    * double_harvest       False\n    * intercrop            True\n    * sim_path             {test_path}/data/\n  Coupled model:        copan:CORE\n    * start_coupling    2023\n    * input (coupled)   ['with_tillage']\n    * output (coupled)  ['grid', 'pft_harvestc', 'cftfrac', 'soilc_agr_layer', 'hdate', 'country', 'region']\n  "  # noqa
+        == f"<pycoupler.LPJmLCoupler>\nSimulation:  (version: 3, localhost:<closed>)\n  * sim_year   2050\n  * ncell      2\n  * ninput     1\nConfiguration:\n  Settings:      lpjml v5.8\n    (general)\n    * sim_name   coupled_test\n    * firstyear  2001\n    * lastyear   2050\n    * startgrid  27410\n    * endgrid    27411\n    * landuse    yes\n    (changed)\n    * model_path           LPJmL_internal\n    * sim_path             {test_path}/data/\n    * outputyear           2022\n    * output_metafile      True\n    * write_restart        False\n    * nspinup              0\n    * float_grid           True\n    * restart_filename     restart/restart_historic_run.lpj\n    * outputyear           2022\n    * radiation            cloudiness\n    * fix_co2              True\n    * fix_co2_year         2018\n    * fix_climate          True\n    * fix_climate_cycle    11\n    * fix_climate_year     2013\n    * river_routing        False\n    * tillage_type         read\n    * residue_treatment    fixed_residue_remove\n    * double_harvest       False\n    * intercrop            True\n    * sim_path             {test_path}/data/\n  Coupled model:        copan:CORE\n    * start_coupling    2023\n    * input (coupled)   ['with_tillage']\n    * output (coupled)  ['grid', 'pft_harvestc', 'cftfrac', 'soilc_agr_layer', 'hdate', 'country', 'region']\n  "  # noqa
     )
 
 
-@patch.dict(os.environ, {"TEST_PATH": get_test_path(), "TEST_LINE_COUNTER": "0"})
-def test_copy_input(test_path):
+@patch.dict(os.environ, {"TEST_PATH": get_test_path()})
+def test_copy_input(test_path, lpjml_trace):
 
     config_coupled_fn = f"{test_path}/data/config_coupled_test.json"
-    lpjml_coupler = LPJmLCoupler(config_file=config_coupled_fn)
+    lpjml_coupler = LPJmLCoupler(
+        config_file=config_coupled_fn, transport=ReplayTransport(lpjml_trace)
+    )
 
     inputs = lpjml_coupler.read_input(copy=False)
 
     assert lpjml_coupler._copy_input(start_year=2022, end_year=2022) == "tested"
+
+
+def test_read_into():
+    sender, receiver = socket.socketpair()
+
+    data = np.arange(6, dtype=np.float32).reshape(3, 2)
+    # band-major wire layout: all cells of band 1, then all cells of band 2
+    sender.sendall(np.int32(42).tobytes() + data.T.tobytes())
+
+    buffer = np.empty((3, 2), dtype=LPJmlValueType.LPJML_FLOAT.dtype, order="F")
+    assert read_int(receiver) == 42
+    assert read_into(receiver, buffer) is buffer
+    assert np.array_equal(buffer, data)
+
+    sender.close()
+    with pytest.raises(ConnectionError):
+        read_into(receiver, buffer)
+    receiver.close()
+
+
+def test_read_fun():
+    sender, receiver = socket.socketpair()
+    sender.sendall(np.float64(0.1).tobytes() + np.int16(-3).tobytes())
+    assert LPJmlValueType.LPJML_DOUBLE.read_fun(receiver) == 0.1
+    assert LPJmlValueType.LPJML_SHORT.read_fun(receiver) == -3
+    sender.close()
+    receiver.close()
+
+
+def test_wire_plan():
+    sender, receiver = socket.socketpair()
+
+    plan = LPJmLWirePlan(
+        order=[44, 25],
+        ncell=3,
+        bands={25: 2, 44: 1},
+        types={25: LPJmlValueType.LPJML_FLOAT, 44: LPJmlValueType.LPJML_SHORT},
+    )
+    hdate = np.array([[1], [2], [3]], dtype=np.int16)
+    harvest = np.arange(6, dtype=np.float32).reshape(3, 2)
+
+    def send_year(year, index=25):
+        sender.sendall(
+            np.array([1, 44, year], dtype=np.int32).tobytes()
+            + hdate.T.tobytes()
+            + np.array([1, index, year], dtype=np.int32).tobytes()
+            + harvest.T.tobytes()
+        )
+
+    assert plan.nbytes == 2 * 12 + 3 * 2 + 6 * 4
+
+    send_year(2023)
+    plan.receive(receiver)
+    plan.validate(2023)
+    assert np.array_equal(plan.values[44], hdate)
+    assert np.array_equal(plan.values[25], harvest)
+
+    with pytest.raises(ValueError, match="expected year"):
+        plan.validate(2024)
+
+    send_year(2024, index=37)
+    plan.receive(receiver)
+    with pytest.raises(ValueError, match="output index 37"):
+        plan.validate(2024)
+
+    # views are rebuilt on the arena when copied
+    plan_copy = deepcopy(plan)
+    assert np.shares_memory(plan_copy.values[25], plan_copy.arena)
+
+    sender.close()
+    receiver.close()
+
+
+@patch.dict(os.environ, {"TEST_PATH": get_test_path()})
+def test_lpjml_coupler_background(test_path, lpjml_trace):
+
+    config_coupled_fn = f"{test_path}/data/config_coupled_test.json"
+    outputs = {}
+    # (prefetch, send_queue)
+    for background in [(False, False), (True, False), (False, True), (True, True)]:
+        lpjml_coupler = LPJmLCoupler(
+            config_file=config_coupled_fn,
+            transport=ReplayTransport(lpjml_trace),
+            prefetch=background[0],
+            send_queue=background[1],
+        )
+        inputs = lpjml_coupler.read_input(copy=False)
+        outputs[background] = [lpjml_coupler.read_historic_output()]
+
+        for year in lpjml_coupler.get_sim_years():
+            lpjml_coupler.send_input(inputs, year)
+            outputs[background].append(lpjml_coupler.read_output(year).copy(deep=True))
+
+        lpjml_coupler.close()
+
+    for background in outputs:
+        assert len(outputs[background]) == len(outputs[(False, False)])
+        for output, output_background in zip(
+            outputs[(False, False)], outputs[background]
+        ):
+            assert output.equals(output_background)
+
+
+@patch.dict(os.environ, {"TEST_PATH": get_test_path()})
+def test_send_queue_error(test_path, lpjml_trace):
+
+    config_coupled_fn = f"{test_path}/data/config_coupled_test.json"
+    lpjml_coupler = LPJmLCoupler(
+        config_file=config_coupled_fn,
+        transport=ReplayTransport(lpjml_trace),
+        send_queue=True,
+    )
+    lpjml_coupler.read_historic_output()
+
+    # with_tillage requires integer input, error is raised on the next call
+    year = lpjml_coupler.sim_year
+    lpjml_coupler.send_input({"with_tillage": np.zeros((2, 1))}, year)
+    with pytest.raises(TypeError, match="Unsupported type"):
+        lpjml_coupler.read_output(year)
+
+
+@pytest.mark.parametrize(
+    "fake_coupling", [{"transport": "loopback"}, {"transport": "unix"}], indirect=True
+)
+def test_lpjml_coupler_fake(fake_coupling):
+    # couple via real sockets with the LPJmL emulator, config used as is
+    lpjml, lpjml_coupler = fake_coupling.lpjml, fake_coupling.coupler
+    assert np.array_equal(lpjml_coupler.grid.values, lpjml.static_data(0))
+
+    def check_outputs(year, outputs):
+        assert np.array_equal(
+            outputs["soilc_agr_layer"].values[..., 0], lpjml.data(231, year).T
+        )
+
+    outputs = fake_coupling.run(callback=check_outputs)
+    # outputs kept in the data types sent by LPJmL
+    assert outputs["soilc_agr_layer"].dtype == np.float32
+    assert outputs["hdate"].dtype == np.int16
+    assert fake_coupling.historic["hdate"].dtype == np.int16
+    assert lpjml_coupler.country.dtype == np.int16
+
+    fake_coupling.close()
+    # copyable with the sockets (e.g. of the loopback transport) excluded
+    copied = deepcopy(lpjml_coupler)
+    assert copied.transport.name == lpjml_coupler.transport.name
+    assert copied.ncell == lpjml_coupler.ncell
+    assert np.array_equal(
+        lpjml.received[(fake_coupling.config.lastyear, 7)],
+        fake_coupling.inputs["with_tillage"],
+    )
+
+
+@pytest.mark.parametrize(
+    "fake_coupling",
+    [
+        # LPJmL emulator computing slower than the (idle) caller
+        {"lpjml": {"delay": 0.01}, "output_timings": False},
+        {"lpjml": {"delay": 0.01}, "output_timings": True},
+    ],
+    indirect=True,
+)
+def test_lpjml_coupler_stats(fake_coupling):
+    config, lpjml_coupler = fake_coupling.config, fake_coupling.coupler
+    lpjml_coupler.add_reducer("cftfrac", "sum")
+    outputs = fake_coupling.run()
+    fake_coupling.close()
+
+    stats = lpjml_coupler.stats
+    # historic output year recorded as well
+    sim_years = list(range(config.start_coupling, config.lastyear + 1))
+    assert list(stats.years) == [config.outputyear] + sim_years
+    record = stats[config.lastyear]
+    if fake_coupling.options["output_timings"]:
+        assert set(record["receive_s"]) == set(outputs.data_vars)
+    else:
+        # year received at once
+        assert set(record["receive_s"]) == {"outputs"}
+    assert set(record["decode_s"]) == set(outputs.data_vars)
+    assert set(record["reduce_s"]) == {"cftfrac_sum_band"}
+    assert set(record["send_s"]) == {"with_tillage"}
+    assert record["bytes"]["with_tillage"] == 2 * np.dtype(np.int32).itemsize
+    assert (
+        record["bytes"]["soilc_agr_layer"] == fake_coupling.lpjml.data(231, 2050).nbytes
+    )
+    assert record["lpjml_s"] >= 0.01
+
+    summary = stats.summary()
+    assert summary["bound"] == "lpjml"
+    assert list(stats.to_dataframe().index) == list(stats.years)
+
+
+@pytest.mark.parametrize(
+    "fake_coupling", [{"output_ring": 2, "upcast": True}], indirect=True
+)
+def test_lpjml_coupler_output_ring(fake_coupling):
+    lpjml, lpjml_coupler = fake_coupling.lpjml, fake_coupling.coupler
+    historic = lpjml_coupler.read_historic_output()
+    assert np.array_equal(
+        historic["soilc_agr_layer"].values[..., 0, 0], lpjml.data(231, 2022)[0]
+    )
+
+    outputs = []
+    for year in lpjml_coupler.get_sim_years():
+        lpjml_coupler.send_input(fake_coupling.inputs, year)
+        outputs.append(lpjml_coupler.read_output(year, to_xarray=year % 2 == 0))
+        if year % 2 == 0:
+            assert outputs[-1].time.dt.year.item() == year
+            values = outputs[-1]["soilc_agr_layer"].values
+        else:
+            values = outputs[-1]["soilc_agr_layer"]
+        assert np.array_equal(values[..., 0], lpjml.data(231, year).T)
+    fake_coupling.close()
+
+    assert outputs[0]["soilc_agr_layer"].dtype == np.float64
+    assert outputs[1]["hdate"].dtype == np.int64
+
+    # outputs are reused every second year
+    assert outputs[0] is outputs[2]
+    assert outputs[0] is not outputs[1]
+    assert np.shares_memory(
+        outputs[1]["soilc_agr_layer"], outputs[3]["soilc_agr_layer"]
+    )
+
+
+def test_lpjml_coupler_writer(fake_coupling, tmp_path):
+    config, lpjml = fake_coupling.config, fake_coupling.lpjml
+    writer = fake_coupling.coupler.open_writer(
+        f"{tmp_path}/outputs.nc", outputs=["soilc_agr_layer", "hdate"]
+    )
+    outputs = fake_coupling.run()
+    fake_coupling.close()
+    assert writer.nyear == config.lastyear - config.outputyear + 1
+    with netCDF4.Dataset(f"{tmp_path}/outputs.nc") as written:
+        # one year per chunk, appends write complete chunks
+        assert written["soilc_agr_layer"].chunking() == [1, 2, 5]
+
+    with xr.open_dataset(f"{tmp_path}/outputs.nc") as written:
+        assert set(written.data_vars) == {"soilc_agr_layer", "hdate"}
+        assert written["hdate"].dtype == np.int16
+        assert written.time.dt.year.values[0] == config.outputyear
+        assert np.array_equal(
+            written["soilc_agr_layer"].isel(time=-1).values,
+            outputs["soilc_agr_layer"].values[..., 0],
+        )
+        assert np.array_equal(
+            written["hdate"].isel(time=0).values.T, lpjml.data(44, config.outputyear)
+        )
+
+
+@pytest.mark.parametrize("fake_coupling", [{"prefetch": True}], indirect=True)
+def test_lpjml_coupler_close_writer_error(fake_coupling, tmp_path):
+    lpjml_coupler = fake_coupling.coupler
+    failing = lpjml_coupler.open_writer(f"{tmp_path}/failing.nc", outputs=["hdate"])
+    writer = lpjml_coupler.open_writer(f"{tmp_path}/outputs.nc", outputs=["hdate"])
+    fake_coupling.run()
+    assert lpjml_coupler._channel_executor is not None
+
+    # e.g. flushing a full disk
+    with patch.object(failing, "close", side_effect=OSError("disk full")):
+        with patch.object(writer, "close", wraps=writer.close) as writer_close:
+            with pytest.raises(OSError, match="disk full"):
+                lpjml_coupler.close()
+    # remaining writers and the background thread are closed anyway
+    writer_close.assert_called_once()
+    assert lpjml_coupler._channel_executor is None
+    failing.close()
+
+
+def test_lpjml_coupler_history(fake_coupling, tmp_path):
+    config, lpjml_coupler = fake_coupling.config, fake_coupling.coupler
+    history = lpjml_coupler.open_history(path=f"{tmp_path}/history")
+    cell_major = lpjml_coupler.open_history(
+        path=f"{tmp_path}/history", outputs=["hdate"], layout=("cell", "band", "time")
+    )
+    temporary = lpjml_coupler.open_history(outputs=["hdate"])
+    # capacity checked before any year is received
+    with pytest.raises(ValueError, match="cannot hold"):
+        lpjml_coupler.open_history(nyear=2)
+    fake_coupling.run()
+    fake_coupling.close()
+
+    # temporary directory removed on close, views still accessible
+    assert not os.path.exists(temporary.path)
+    assert np.array_equal(temporary["hdate"].values, history["hdate"].values)
+
+    nyear = config.lastyear - config.outputyear + 1
+    assert len(history) == history.nyear == nyear
+    hdate = history["hdate"]
+    assert hdate.dims == ("time", "band (hdate)", "cell")
+    assert hdate.dtype == np.int16
+    assert os.path.isfile(history.get_file_name("hdate"))
+    assert np.array_equal(hdate.isel(time=1).values, fake_coupling.lpjml.data(44, 2023))
+    assert hdate.time.dt.year.values[-1] == config.lastyear
+    assert np.array_equal(
+        cell_major["hdate"].transpose(*hdate.dims).values, hdate.values
+    )
+    assert set(history.to_dataset().data_vars) == set(history.names)
+
+
+@pytest.mark.parametrize("fake_coupling", [{"recent_years": 5}], indirect=True)
+def test_lpjml_coupler_recent_outputs(fake_coupling):
+    config, lpjml = fake_coupling.config, fake_coupling.lpjml
+    lpjml_coupler = fake_coupling.coupler
+    recent_outputs = []
+
+    def check_recent(year, outputs):
+        recent = lpjml_coupler.recent_outputs
+        years = list(range(max(year - 4, config.outputyear), year + 1))
+        assert recent.time.dt.year.values.tolist() == years
+        assert np.array_equal(
+            recent["hdate"].isel(time=0).values.T, lpjml.data(44, years[0])
+        )
+        assert np.array_equal(
+            recent["hdate"].isel(time=-1).values.T, lpjml.data(44, year)
+        )
+        recent_outputs.append(recent)
+
+    fake_coupling.run(callback=check_recent)
+    # views on the same circular buffers
+    assert np.shares_memory(
+        recent_outputs[-1]["hdate"].values,
+        lpjml_coupler.recent_outputs["hdate"].values,
+    )
+
+
+def test_lpjml_coupler_lazy_outputs(fake_coupling):
+    config = fake_coupling.config
+    outputs = fake_coupling.run(lazy=True)
+    fake_coupling.close()
+
+    assert isinstance(outputs, LPJmLOutputs)
+    assert set(outputs) == {"pft_harvestc", "cftfrac", "soilc_agr_layer", "hdate"}
+    assert np.array_equal(
+        outputs.arrays["hdate"][..., 0],
+        fake_coupling.lpjml.data(44, config.lastyear).T,
+    )
+    hdate = outputs["hdate"]
+    # built on first access only, then cached
+    assert outputs["hdate"] is hdate
+    assert hdate.time.dt.year.item() == config.lastyear
+    assert hdate.dims == ("cell", "band (hdate)", "time")
+    assert hdate.attrs["long_name"]
+    assert set(outputs.to_dataset().data_vars) == set(outputs)
+    # standard Mapping API
+    assert all(isinstance(value, xr.DataArray) for value in outputs.values())
+    assert dict(outputs.items()) == dict(outputs)
+    assert dict(outputs)["hdate"] is hdate
+
+
+def test_lpjml_coupler_reducers(fake_coupling):
+    config, lpjml = fake_coupling.config, fake_coupling.lpjml
+    lpjml_coupler = fake_coupling.coupler
+    lpjml_coupler.add_reducer("pft_harvestc", "sum", by="country")
+    lpjml_coupler.add_reducer("soilc_agr_layer", "mean", dim="cell", weights=[1, 3])
+    lpjml_coupler.add_reducer("cftfrac", "sum", dim="band")
+    with pytest.raises(ValueError):
+        lpjml_coupler.add_reducer("grid")
+    with pytest.raises(ValueError):
+        lpjml_coupler.add_reducer("cftfrac", "max")
+
+    reductions = fake_coupling.run(reduce_only=True)
+    country = lpjml_coupler.country.values[:, 0]
+    fake_coupling.close()
+
+    assert set(reductions) == {
+        "pft_harvestc_sum_country",
+        "soilc_agr_layer_mean_cell",
+        "cftfrac_sum_band",
+    }
+    assert reductions is lpjml_coupler.reductions
+
+    harvestc = lpjml.data(25, config.lastyear).T
+    groups, index = np.unique(country, return_inverse=True)
+    expected = np.zeros((len(groups), harvestc.shape[1]))
+    np.add.at(expected, index, harvestc)
+    assert np.allclose(reductions["pft_harvestc_sum_country"], expected)
+
+    soilc = lpjml.data(231, config.lastyear).T
+    assert np.allclose(
+        reductions["soilc_agr_layer_mean_cell"],
+        np.average(soilc, axis=0, weights=[1, 3]),
+    )
+    assert np.allclose(
+        reductions["cftfrac_sum_band"], lpjml.data(37, config.lastyear).T.sum(axis=1)
+    )
+
+
+# country codes of the fake cells are cell % 97 (56 and 57)
+@pytest.mark.parametrize(
+    "fake_coupling",
+    [{"recent_years": 2, "cell_mask": {"country": [57]}}],
+    indirect=True,
+)
+def test_lpjml_coupler_cell_mask(fake_coupling):
+    config, lpjml_coupler = fake_coupling.config, fake_coupling.coupler
+    lpjml_coupler.add_reducer("pft_harvestc", "sum", dim="cell")
+    outputs = fake_coupling.run()
+    recent_outputs = lpjml_coupler.recent_outputs
+    fake_coupling.close()
+
+    assert lpjml_coupler.ncell == 2
+    assert list(lpjml_coupler.cell_mask) == [config.endgrid]
+    assert fake_coupling.historic.sizes["cell"] == 1
+    assert list(outputs.cell.values) == [config.endgrid]
+    assert outputs.lon.shape == (1,)
+    harvestc = fake_coupling.lpjml.data(25, config.lastyear).T
+    assert np.array_equal(outputs["pft_harvestc"].values[..., 0], harvestc[[1]])
+    assert np.array_equal(recent_outputs["pft_harvestc"].values[..., -1], harvestc[[1]])
+    assert np.allclose(lpjml_coupler.reductions["pft_harvestc_sum_cell"], harvestc[1])
+
+
+def test_lpjml_coupler_cell_mask_invalid(coupled_config):
+    config, config_file = coupled_config
+    transport = get_transport("loopback")
+    lpjml = FakeLPJmL.from_config(config, transport=transport)
+    lpjml.start()
+    with pytest.raises(ValueError, match="does not select any cell"):
+        LPJmLCoupler(
+            config_file=config_file,
+            transport=transport,
+            cell_mask={"bbox": (0, 0, 10, 10)},
+        )
@@ -2,6 +2,7 @@
 
 import os
 import numpy as np
+import pytest
 from unittest.mock import patch
 
 from pycoupler.data import (
@@ -11,8 +12,10 @@ from pycoupler.data import (
     get_headersize,
     LPJmLInputType,
     append_to_dict,
+    LPJmLAppender,
 )
 from pycoupler.coupler import LPJmLCoupler
+from pycoupler.trace import ReplayTransport
 from .conftest import get_test_path
 
 
@@ -35,13 +38,13 @@ def test_read_data(test_path):
     assert tillage_data.__class__.__name__ == "LPJmLDataSet"
 
 
-@patch.dict(
-    os.environ, {"TEST_PATH": get_test_path(), "TEST_LINE_COUNTER": "0"}
-)  # noqa
-def test_get_neighbourhood(test_path):
+@patch.dict(os.environ, {"TEST_PATH": get_test_path()})  # noqa
+def test_get_neighbourhood(test_path, lpjml_trace):
 
     config_coupled_fn = f"{test_path}/data/config_coupled_test.json"
-    lpjml_coupler = LPJmLCoupler(config_file=config_coupled_fn)
+    lpjml_coupler = LPJmLCoupler(
+        config_file=config_coupled_fn, transport=ReplayTransport(lpjml_trace)
+    )
 
     neighbourhood = lpjml_coupler.grid.get_neighbourhood().values
 
@@ -153,3 +156,33 @@ def test_lpjmlinputtype(test_path):
     assert fertilizer_nr.name == "fertilizer_nr"
     assert fertilizer_nr.nband == 32
     assert fertilizer_nr.type == float
+
+
+def test_append_to_dict():
+    years = [np.full((3, 2), year, dtype=np.float32) for year in range(3)]
+    history = append_to_dict({}, {"npp": years[0]})
+    previous = history["npp"]
+    history = append_to_dict(history, {"npp": years[1]})
+    history = append_to_dict(history, {"npp": years[2]})
+    assert np.array_equal(history["npp"], np.dstack(years))
+    # no memory shared with earlier results
+    assert not np.shares_memory(history["npp"], previous)
+
+
+def test_appender():
+    years = [np.full((3, 2), year, dtype=np.float32) for year in range(10)]
+    appender = LPJmLAppender()
+    views = []
+    for values in years:
+        appender.append({"npp": values})
+        views.append(appender["npp"])
+    assert np.array_equal(appender["npp"], np.dstack(years))
+    assert appender.to_dict()["npp"].shape == (3, 2, 10)
+    # earlier views keep their values
+    assert np.array_equal(views[2], np.dstack(years[:3]))
+    # appended in place while there is spare capacity
+    assert np.shares_memory(views[-1], views[-2])
+    assert not np.shares_memory(appender.to_dict(copy=True)["npp"], views[-1])
+
+    with pytest.raises(ValueError, match="does not match"):
+        appender.append({"npp": np.zeros((2, 2))})
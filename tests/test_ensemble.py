@@ -0,0 +1,95 @@
+"""Test the EnsembleCoupler class."""
+
+import asyncio
+import numpy as np
+import pytest
+
+from pycoupler.ensemble import EnsembleCoupler
+from pycoupler.testing import FakeLPJmL
+from pycoupler.transport import get_transport
+
+
+def test_ensemble_coupler(coupled_config, tmp_path):
+    config, config_coupled_fn = coupled_config
+
+    nmember = 3
+    transports = [
+        get_transport("unix", path=f"{tmp_path}/lpjml_{member}.sock")
+        for member in range(nmember)
+    ]
+    lpjmls = [
+        FakeLPJmL.from_config(config, transport=transport, order=[44, 25, 231, 37])
+        for transport in transports
+    ]
+    for lpjml in lpjmls:
+        lpjml.start()
+
+    async def couple():
+        ensemble = await EnsembleCoupler.create(
+            [config_coupled_fn] * nmember, transport=transports
+        )
+        assert len(ensemble) == nmember
+        assert ensemble.ports == [transport.path for transport in transports]
+
+        historic = await ensemble.read_historic_output()
+        assert len(historic) == nmember
+
+        # per member inputs stacked along the first dimension
+        inputs = {"with_tillage": np.arange(2 * nmember).reshape(nmember, 2, 1)}
+        for year in ensemble.get_sim_years():
+            await ensemble.send_input(inputs, year, stacked=True)
+            outputs = await ensemble.read_output(year)
+        # stacked inputs need a leading member dimension
+        with pytest.raises(ValueError, match="leading member dimension"):
+            await ensemble.send_input(
+                {"with_tillage": np.zeros((2, 1), dtype=int)},
+                year,
+                stacked=True,
+            )
+        return inputs, outputs
+
+    inputs, outputs = asyncio.run(couple())
+    for member, lpjml in enumerate(lpjmls):
+        lpjml.join()
+        assert np.array_equal(
+            lpjml.received[(config.lastyear, 7)], inputs["with_tillage"][member]
+        )
+    assert outputs["soilc_agr_layer"].shape[:2] == (nmember, 2)
+    assert np.array_equal(
+        outputs["soilc_agr_layer"][1, :, 0, 0],
+        lpjmls[1].data(231, config.lastyear).T[:, 0],
+    )
+
+
+def test_ensemble_coupler_allocate(coupled_config):
+    config, config_coupled_fn = coupled_config
+
+    nmember = 2
+    # LPJmL runs are told their ports before the ensemble is created
+    ports = EnsembleCoupler.allocate(nmember, port=40224)
+    lpjmls = [
+        FakeLPJmL.from_config(config, port=port, order=[44, 25, 231, 37])
+        for port in ports
+    ]
+    for lpjml in lpjmls:
+        lpjml.start()
+
+    async def couple():
+        with pytest.raises(ValueError, match="Ports of the members"):
+            await EnsembleCoupler.create([config_coupled_fn] * nmember)
+        ensemble = await EnsembleCoupler.create(
+            [config_coupled_fn] * nmember, ports=ports
+        )
+        assert ensemble.ports == ports
+        await ensemble.read_historic_output()
+        for year in ensemble.get_sim_years():
+            await ensemble.send_input({"with_tillage": np.array([[1], [0]])}, year)
+            outputs = await ensemble.read_output(year)
+        ensemble.close()
+        return outputs
+
+    outputs = asyncio.run(couple())
+    for lpjml in lpjmls:
+        lpjml.join()
+        assert np.array_equal(lpjml.received[(config.lastyear, 7)], [[1], [0]])
+    assert outputs["hdate"].shape[:2] == (nmember, 2)
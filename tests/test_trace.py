@@ -0,0 +1,71 @@
+"""Test recording and replaying of protocol traces."""
+
+import numpy as np
+import pytest
+
+from pycoupler.coupler import LPJmLCoupler
+from pycoupler.testing import FakeLPJmL
+from pycoupler.trace import RECEIVED, SENT, ReplayTransport, read_trace
+from pycoupler.transport import LoopbackTransport
+
+
+def run_coupler(lpjml_coupler):
+    outputs = [lpjml_coupler.read_historic_output()]
+    inputs = {"with_tillage": np.array([[1], [0]])}
+    for year in lpjml_coupler.get_sim_years():
+        lpjml_coupler.send_input(inputs, year)
+        outputs.append(lpjml_coupler.read_output(year).copy(deep=True))
+    lpjml_coupler.close()
+    return outputs
+
+
+def test_record_replay(coupled_config, tmp_path):
+    config, config_coupled_fn = coupled_config
+    trace_fn = f"{tmp_path}/coupled_test.trace"
+
+    # record session with the LPJmL emulator
+    lpjml = FakeLPJmL.from_config(config, transport=LoopbackTransport())
+    lpjml.start()
+    outputs = run_coupler(
+        LPJmLCoupler(
+            config_file=config_coupled_fn, transport=lpjml.transport, trace=trace_fn
+        )
+    )
+    lpjml.join()
+
+    records = read_trace(trace_fn)
+    assert {direction for direction, _, _ in records} == {RECEIVED, SENT}
+    timestamps = [timestamp for _, timestamp, _ in records]
+    assert timestamps == sorted(timestamps)
+    assert records[0] == (SENT, timestamps[0], b"1")
+
+    # replay session without LPJmL
+    replayed = run_coupler(
+        LPJmLCoupler(
+            config_file=config_coupled_fn,
+            transport=ReplayTransport(trace_fn, validate=True),
+        )
+    )
+    for output, output_replayed in zip(outputs, replayed):
+        assert output.equals(output_replayed)
+
+    # other inputs than recorded
+    lpjml_coupler = LPJmLCoupler(
+        config_file=config_coupled_fn,
+        transport=ReplayTransport(trace_fn, validate=True),
+    )
+    lpjml_coupler.read_historic_output()
+    with pytest.raises(ValueError, match="differ from the trace"):
+        lpjml_coupler.send_input(
+            {"with_tillage": np.array([[0], [0]])}, lpjml_coupler.sim_year
+        )
+
+
+def test_read_trace(test_path, tmp_path):
+    with open(f"{tmp_path}/invalid.trace", "wb") as trace_file:
+        trace_file.write(b"LPJTRACX")
+    with pytest.raises(ValueError, match="not a pycoupler trace"):
+        read_trace(f"{tmp_path}/invalid.trace")
+
+    records = read_trace(f"{test_path}/data/test_receive.trace")
+    assert sum(len(data) for direction, _, data in records if direction == SENT) > 0
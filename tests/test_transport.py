@@ -0,0 +1,105 @@
+"""Test the transports of the LPJmLCoupler."""
+
+import os
+from copy import deepcopy
+import socket
+import threading
+import time
+import pytest
+
+from pycoupler.transport import (
+    LoopbackTransport,
+    TCPTransport,
+    UnixTransport,
+    allocate_ports,
+    get_transport,
+)
+
+
+def test_get_transport(tmp_path):
+    tcp = get_transport("tcp", host="localhost", port=2225)
+    assert isinstance(tcp, TCPTransport)
+    assert (tcp.host, tcp.port) == ("localhost", 2225)
+
+    unix = get_transport("unix", path=f"{tmp_path}/lpjml.sock")
+    assert isinstance(unix, UnixTransport)
+    assert unix.path == f"{tmp_path}/lpjml.sock"
+    assert get_transport("unix", port=2225).path.endswith("pycoupler_2225.sock")
+
+    loopback = LoopbackTransport()
+    assert get_transport(loopback) is loopback
+
+    with pytest.raises(ValueError):
+        get_transport("udp")
+
+
+def test_loopback_transport():
+    transport = LoopbackTransport()
+    channel = transport.accept()
+    transport.peer.sendall(b"lpjml")
+    assert channel.recv(5) == b"lpjml"
+    channel.sendall(b"1")
+    assert transport.peer.recv(1) == b"1"
+    # sockets are excluded from copies
+    copied = deepcopy(transport)
+    assert copied.name == "loopback"
+    assert copied.peer is None and copied.accept() is None
+    channel.close()
+    transport.peer.close()
+
+
+def test_unix_transport(tmp_path):
+    path = f"{tmp_path}/lpjml.sock"
+    transport = UnixTransport(path)
+    # stale socket file of a previous run
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as stale:
+        stale.bind(path)
+
+    def connect():
+        client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        for _ in range(100):
+            try:
+                client.connect(path)
+                break
+            except OSError:
+                time.sleep(0.01)
+        client.sendall(b"lpjml")
+        client.close()
+
+    client = threading.Thread(target=connect)
+    client.start()
+    channel = transport.accept()
+    assert channel.recv(5) == b"lpjml"
+    client.join()
+    channel.close()
+    # socket file is removed after LPJmL has connected
+    assert not os.path.exists(path)
+
+
+def test_unix_transport_existing_file(tmp_path):
+    path = tmp_path / "lpjml.sock"
+    path.write_text("no socket")
+    with pytest.raises(FileExistsError):
+        UnixTransport(str(path)).accept()
+    # only stale sockets are removed
+    assert path.read_text() == "no socket"
+
+    # socket another coupler is listening on is not taken over
+    live_path = str(tmp_path / "live.sock")
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as live:
+        live.bind(live_path)
+        live.listen(1)
+        with pytest.raises(FileExistsError, match="in use"):
+            UnixTransport(live_path).accept()
+        assert os.path.exists(live_path)
+
+
+def test_allocate_ports():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as used:
+        used.bind(("", 0))
+        used.listen(1)
+        port = used.getsockname()[1]
+        ports = allocate_ports(2, port=port)
+    assert len(ports) == 2
+    assert port not in ports
+    assert ports[0] > port